@@ -202,7 +202,8 @@ def handle_intent():
                 params["booking_date"],
                 params["contact_number"],
                 params.get("special_instructions", ""),
-                token
+                token,
+                idempotency_key=params.get("idempotency_key")
             )
             
         elif intent == "get_booking_history":
@@ -336,7 +337,7 @@ def chat_with_agent():
                     reply = "You can view and update your profile information in the user settings. Is there something specific about your profile you'd like to know or update?"
             
             elif intent == "list_services":
-                result = tools.find_nearby_services(21.1458, 79.0882, 50)  # Large radius to get all services
+                result = tools.find_nearby_services(21.1458, 79.0882, 50, limit=20)  # Large radius, nearest 20 services
                 reply = format_service_response(result, intent)
             
             else:
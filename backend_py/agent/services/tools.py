@@ -1,6 +1,7 @@
 from typing import Any, Dict
 import requests
 import os
+import uuid
 from flask_jwt_extended import get_jwt_identity
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000/api")
@@ -23,20 +24,33 @@ def get_service_details(service_id: str) -> Dict[str, Any]:
     except requests.RequestException as e:
         return {"error": f"Failed to get service details: {str(e)}"}
 
-def find_nearby_services(lat: float, lng: float, radius: float = 5) -> Dict[str, Any]:
-    """Find services near a given location."""
+def find_nearby_services(lat: float, lng: float, radius: float = 5, limit: int = None) -> Dict[str, Any]:
+    """Find services near a given location, nearest first when a limit is given."""
     try:
         params = {"lat": lat, "lng": lng, "radius": radius}
+        if limit:
+            params["limit"] = limit
         resp = requests.get(f"{API_BASE_URL}/services/nearby", params=params)
         resp.raise_for_status()
-        return resp.json()
+        data = resp.json()
+        # Paged responses wrap results; callers expect a plain list
+        return data["services"] if limit else data
     except requests.RequestException as e:
         return {"error": f"Failed to find nearby services: {str(e)}"}
 
+# Attempts per create_booking call when the request fails in transit or with a 5xx
+CREATE_BOOKING_ATTEMPTS = 3
+
 def create_booking(service_id: str, client_name: str, client_email: str, 
                   booking_date: str, contact_number: str, 
-                  special_instructions: str = "", token: str = None) -> Dict[str, Any]:
-    """Book a service."""
+                  special_instructions: str = "", token: str = None,
+                  idempotency_key: str = None) -> Dict[str, Any]:
+    """
+    Book a service. One Idempotency-Key is generated per call and reused by
+    its retries, so a call books at most once while a later call for the
+    same slot (e.g. rebooking after a cancellation) is a new booking. Pass
+    idempotency_key to carry the key across calls that retry the same request.
+    """
     try:
         payload = {
             "service": service_id,
@@ -47,7 +61,17 @@ def create_booking(service_id: str, client_name: str, client_email: str,
             "special_instructions": special_instructions
         }
         headers = {"Authorization": f"Bearer {token}"} if token else {}
-        resp = requests.post(f"{API_BASE_URL}/bookings/create", json=payload, headers=headers)
+        headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+        for attempt in range(CREATE_BOOKING_ATTEMPTS):
+            last_attempt = attempt == CREATE_BOOKING_ATTEMPTS - 1
+            try:
+                resp = requests.post(f"{API_BASE_URL}/bookings/create", json=payload, headers=headers)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+                continue
+            if resp.status_code < 500 or last_attempt:
+                break
         resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
@@ -65,15 +89,28 @@ def get_booking_history(client_email: str = None, token: str = None) -> Dict[str
     except requests.RequestException as e:
         return {"error": f"Failed to get booking history: {str(e)}"}
 
-def get_user_profile(user_id: str, token: str = None) -> Dict[str, Any]:
-    """Get user profile details."""
+PROFILE_FIELDS = "name,email,contact_no,age,role,providerDetails,consumerDetails"
+
+def get_user_profiles(user_ids: list, token: str = None, fields: str = "name,role") -> Dict[str, Any]:
+    """Get several users in one request; returns {"users": {id: {...}}, "missing": [...]}."""
     try:
         headers = {"Authorization": f"Bearer {token}"} if token else {}
-        resp = requests.get(f"{API_BASE_URL}/users/profile/{user_id}", headers=headers)
+        resp = requests.post(f"{API_BASE_URL}/users/batch",
+                             json={"ids": list(user_ids), "fields": fields.split(",")}, headers=headers)
         resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
-        return {"error": f"Failed to get user profile: {str(e)}"}
+        return {"error": f"Failed to get user profiles: {str(e)}"}
+
+def get_user_profile(user_id: str, token: str = None) -> Dict[str, Any]:
+    """Get user profile details."""
+    result = get_user_profiles([user_id], token, PROFILE_FIELDS)
+    if "error" in result:
+        return result
+    profile = result.get("users", {}).get(user_id)
+    if profile is None:
+        return {"error": "User not found"}
+    return {"id": user_id, **profile}
 
 def update_user_details(token: str, user_details: dict) -> Dict[str, Any]:
     """Update user details (requires JWT token)."""
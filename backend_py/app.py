@@ -1,10 +1,9 @@
-from flask import Flask
+from flask import Flask, jsonify
 from datetime import timedelta
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from flask_pymongo import PyMongo
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from extensions import mongo, jwt, limiter
+from utils.rate_limit import rate_limit_metrics
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
@@ -24,12 +23,37 @@ app.config["MONGO_URI"] = os.getenv("MONGO_URI")           # MongoDB connection
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=60)    # Access tokens expire in 1 hour
 app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=30)   # Refresh tokens expire in 30 days
 
+# Optional integer tunables read by the routes via app.config.get(key, default)
+for key in (
+    "CATALOG_BATCH_SIZE", "TITLE_SEARCH_LIMIT", "BOOKING_COUNT_TTL", "EXPORT_BATCH_SIZE",
+    "AUTO_COMPLETE_GRACE_HOURS", "AUTO_COMPLETE_CHUNK_SIZE", "AUTO_COMPLETE_INTERVAL_SECONDS",
+    "SCHEDULER_LEASE_SECONDS", "SCHEDULER_POLL_SECONDS", "IDEMPOTENCY_LEASE_SECONDS",
+    "ARCHIVE_AFTER_DAYS", "ARCHIVE_BATCH_SIZE", "ARCHIVE_INTERVAL_SECONDS",
+    "BOOKING_SLOT_MINUTES", "BOOKING_UTC_OFFSET_MINUTES", "BOOKING_DAY_START_HOUR", "BOOKING_DAY_END_HOUR",
+):
+    if os.getenv(key):
+        app.config[key] = int(os.getenv(key))
+
+# Rate limiting. Counters live in a SQLite file shared by all workers on the
+# host (put it on tmpfs); RATELIMIT_STORAGE_URI=memory:// keeps them per worker.
+# Limits are keyed per route and per JWT identity, falling back to client IP.
+app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+app.config["RATELIMIT_STORAGE_URI"] = os.getenv("RATELIMIT_STORAGE_URI", "sqlite:///tmp/craftconnect-ratelimit.sqlite3")
+app.config["RATELIMIT_STRATEGY"] = os.getenv("RATELIMIT_STRATEGY", "sliding-window-counter")
+app.config["RATELIMIT_HEADERS_ENABLED"] = True
+if os.getenv("RATELIMIT_DEFAULT"):
+    app.config["RATELIMIT_DEFAULT"] = os.getenv("RATELIMIT_DEFAULT")  # e.g. "300 per minute", applied to every route
+# Per-route limits (read at request time by utils.rate_limit.configured_limit)
+for key in ("RATE_LIMIT_LOGIN", "RATE_LIMIT_REGISTER", "RATE_LIMIT_CATALOG"):
+    if os.getenv(key):
+        app.config[key] = os.getenv(key)
+
 # Enhanced CORS setup
 CORS(app, resources={
     r"/api/*": {
         "origins": [frontend_url],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+        "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials", "Idempotency-Key"],
         "supports_credentials": True
     }
 })
@@ -37,7 +61,12 @@ CORS(app, resources={
 # Initialize extensions (use the instances from extensions.py)
 jwt.init_app(app)
 mongo.init_app(app)
-# limiter.init_app(app)   # enable if you want rate limits
+limiter.init_app(app)
+
+# Rate-limited requests get the same JSON error shape as the routes
+@app.errorhandler(429)
+def rate_limited(e):
+    return jsonify({"msg": "Too many requests, please slow down", "error": str(e.description)}), 429
 
 # Create a users_collection reference for other modules to use
 users_collection = mongo.db.users
@@ -50,7 +79,7 @@ from routes.chatbot import chatbot_bp
 from agent import agent_bp  # Import agent blueprint
 
 # Import the scheduler
-from utils.scheduler import start_scheduler
+import utils.scheduler
 
 # Register blueprints with URL prefixes
 app.register_blueprint(auth_bp, url_prefix='/api/users')
@@ -59,18 +88,112 @@ app.register_blueprint(bookings_bp, url_prefix='/api/bookings')
 app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
 app.register_blueprint(agent_bp, url_prefix='/api/agent')  # Register agent routes
 
-# DO NOT start scheduler at import time (can block or start multiple times)
-# start_scheduler(app)
+# Ensure collection indexes exist (create_index is a no-op when already present)
+# Set ENSURE_INDEXES=false to skip this when the database is managed separately
+from models.service import ensure_service_indexes
+from models.booking import ensure_booking_indexes
+from utils.idempotency import ensure_idempotency_indexes
+if os.getenv("ENSURE_INDEXES", "true").lower() == "true":
+    ensure_service_indexes(mongo.db)
+    ensure_booking_indexes(mongo.db, logger=app.logger)
+    ensure_idempotency_indexes(mongo.db, int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 86400)))
+
+# Warm the in-process catalog indexes; they refresh themselves if this fails
+from utils.suggest_index import suggest_index
+suggest_index.refresh_seconds = int(os.getenv("SUGGEST_INDEX_REFRESH_SECONDS", 300))
+try:
+    suggest_index.rebuild(mongo.db.services)
+except Exception as e:
+    app.logger.error(f"Error building suggest index: {str(e)}")
+
+# Password hashing runs on a bounded pool so login/register bursts can't take
+# every request thread. PASSWORD_HASH_METHOD is a werkzeug method string
+# (e.g. scrypt:32768:8:1); users are rehashed on login when it changes.
+from utils.password_hasher import password_hasher
+password_hasher.configure(
+    method=os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", 2)),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", 32)),
+    timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", 10))
+)
+
+# Read-through cache for catalog reads: SERVICE_CACHE_BACKEND=memory (per worker,
+# so only safe with one worker), sqlite (shared by all workers on the host via
+# SERVICE_CACHE_PATH) or none. Defaults to sqlite when GUNICORN_WORKERS (or
+# WEB_CONCURRENCY) is above 1, so writes invalidate every worker's view.
+from utils.cache import service_cache, make_backend, default_backend_kind
+web_workers = int(os.getenv("GUNICORN_WORKERS", os.getenv("WEB_CONCURRENCY", 1)))
+if web_workers > 1 and os.getenv("SERVICE_CACHE_BACKEND") == "memory":
+    app.logger.warning("SERVICE_CACHE_BACKEND=memory with several workers: service writes only invalidate one worker")
+service_cache.configure(
+    make_backend(
+        os.getenv("SERVICE_CACHE_BACKEND", default_backend_kind(web_workers)),
+        max_entries=int(os.getenv("SERVICE_CACHE_MAX_ENTRIES", 1024)),
+        path=os.getenv("SERVICE_CACHE_PATH")
+    ),
+    ttl=int(os.getenv("SERVICE_CACHE_TTL", 300))
+)
+
+# Cached profile views for login/refresh, with the same backend choice (and the
+# same sqlite default for several workers) as the service cache. Cached views
+# keep the email encrypted and the sqlite file is owner-only (0600); it
+# defaults to tmpfs when there is one
+from utils.user_profile import profile_cache
+profile_cache.configure(
+    make_backend(
+        os.getenv("PROFILE_CACHE_BACKEND", default_backend_kind(web_workers)),
+        max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 4096)),
+        path=os.getenv("PROFILE_CACHE_PATH") or (
+            "/dev/shm/craftconnect-profiles.sqlite3" if os.path.isdir("/dev/shm") else "/tmp/craftconnect-profiles.sqlite3"
+        )
+    ),
+    ttl=int(os.getenv("PROFILE_CACHE_TTL", 300))
+)
+
+# Optional in-memory spatial index for /api/services/nearby (falls back to $near when off)
+app.config["NEARBY_INDEX_ENABLED"] = os.getenv("NEARBY_INDEX_ENABLED", "false").lower() == "true"
+if app.config["NEARBY_INDEX_ENABLED"]:
+    from utils.geo_index import nearby_index
+    nearby_index.refresh_seconds = int(os.getenv("NEARBY_INDEX_REFRESH_SECONDS", 300))
+    try:
+        nearby_index.rebuild(mongo.db.services)
+    except Exception as e:
+        app.logger.error(f"Error building nearby index: {str(e)}")
+
+# The scheduler elects a leader through a MongoDB lease, so it is safe to start
+# in every gunicorn worker: only the lease holder runs jobs
+if os.getenv("SCHEDULER_ENABLED", "true").lower() == "true":
+    utils.scheduler.start_scheduler(app)
 
 # Simple health endpoint for Railway /load-balancer checks
 @app.route('/health', methods=['GET'])
+@limiter.exempt
 def health():
     return {"status": "ok"}, 200
 
+# Scheduler lease holder, job schedule, run history and durations
+@app.route('/api/scheduler/status', methods=['GET'])
+@jwt_required()
+def scheduler_status():
+    if utils.scheduler.scheduler is None:
+        return jsonify({"msg": "Scheduler is not running in this process"}), 404
+    return jsonify(utils.scheduler.scheduler.status()), 200
+
+# Rate limit rejections in this worker, by endpoint and limit
+@app.route('/api/rate-limit/stats', methods=['GET'])
+@jwt_required()
+def rate_limit_stats():
+    return jsonify({
+        "enabled": app.config["RATELIMIT_ENABLED"],
+        "storage": app.config["RATELIMIT_STORAGE_URI"].split("://", 1)[0],
+        "strategy": app.config["RATELIMIT_STRATEGY"],
+        **rate_limit_metrics.stats()
+    }), 200
+
 # Run the Flask application
 # if __name__ == '__main__':
 #     # When using the reloader, only start scheduler in the child process
 #     if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or os.environ.get("FLASK_RUN_FROM_CLI") == "true":
-#         start_scheduler(app)
+#         utils.scheduler.start_scheduler(app)
 #     # Bind to 0.0.0.0 and use the PORT provided by the environment (Railway sets PORT)
 #     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
\ No newline at end of file
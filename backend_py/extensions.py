@@ -1,9 +1,10 @@
 from flask_pymongo import PyMongo
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from utils.rate_limit import rate_limit_key, rate_limit_metrics
 
 # Extension instances (do NOT bind to app here)
 mongo = PyMongo()
 jwt = JWTManager()
-limiter = Limiter(key_func=get_remote_address)
+# Storage, strategy and default limits come from the RATELIMIT_* app config
+limiter = Limiter(key_func=rate_limit_key, on_breach=rate_limit_metrics.on_breach)
@@ -35,12 +35,54 @@ def validate_booking(data):
         errors.append(f"status must be one of {ALLOWED_STATUSES}")
     return errors
 
-def ensure_booking_indexes(db):
+def ensure_booking_indexes(db, logger=None):
     bookings = db.bookings
     try:
         bookings.create_index("service_id", background=True)
         bookings.create_index("consumer_id", background=True)
         bookings.create_index("provider_id", background=True)
         bookings.create_index("scheduled_at", background=True)
+        # Booking history, newest first
+        bookings.create_index([("consumer_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        bookings.create_index([("consumer_email", 1), ("created_at", -1), ("_id", -1)], background=True)
+        bookings.create_index([("provider_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        # Provider exports by scheduled date
+        bookings.create_index([("provider_id", 1), ("scheduled_at", 1)], background=True)
+        # Auto-complete sweep
+        bookings.create_index([("status", 1), ("scheduled_at", 1)], background=True)
+    except Exception:
+        pass
+    # One active booking per provider per slot; cancelling unsets slot_start.
+    # This index is what prevents double-booking, so it gets its own attempt
+    # and a failure is always reported
+    try:
+        bookings.create_index(
+            [("provider_id", 1), ("slot_start", 1)],
+            unique=True,
+            partialFilterExpression={"slot_start": {"$exists": True}},
+            name="provider_slot_unique",
+            background=True
+        )
+    except Exception as e:
+        msg = f"Could not create the provider_slot_unique index, double bookings are not prevented: {str(e)}"
+        if logger:
+            logger.error(msg)
+        else:
+            print(msg)
+    ensure_archive_indexes(db)
+    # Provider analytics buckets, read by day range
+    try:
+        db.provider_daily_stats.create_index([("provider_id", 1), ("day", 1)], background=True)
+    except Exception:
+        pass
+
+def ensure_archive_indexes(db):
+    # bookings_archive serves history and export reads only, never the slot index
+    archive = db.bookings_archive
+    try:
+        archive.create_index([("consumer_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        archive.create_index([("consumer_email", 1), ("created_at", -1), ("_id", -1)], background=True)
+        archive.create_index([("provider_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        archive.create_index([("provider_id", 1), ("scheduled_at", 1)], background=True)
     except Exception:
         pass
\ No newline at end of file
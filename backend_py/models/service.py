@@ -29,4 +29,26 @@ def validate_service(service_data):
     elif "coordinates" not in service_data["location"] or len(service_data["location"]["coordinates"]) != 2:
         errors.append("Location must have coordinates [longitude, latitude]")
         
-    return errors
\ No newline at end of file
+    return errors
+
+def ensure_service_indexes(db):
+    """
+    Create indexes used by catalog reads: geospatial lookups and the weighted
+    full-text index behind /search and /service/title/<title>.
+    Call with mongo.db (PyMongo database) from app startup.
+    """
+    services = db.services
+    try:
+        services.create_index([("location", "2dsphere")], background=True)
+    except Exception:
+        pass
+    try:
+        services.create_index(
+            [("title", "text"), ("description", "text"), ("provider_name", "text")],
+            weights={"title": 10, "provider_name": 3, "description": 1},
+            name="services_text",
+            default_language="english",
+            background=True
+        )
+    except Exception:
+        pass
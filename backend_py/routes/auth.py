@@ -1,14 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, create_refresh_token
-from werkzeug.security import generate_password_hash, check_password_hash
-from utils.encryption import encrypt, decrypt, hash_email
+from utils.password_hasher import password_hasher, HasherBusy
+from utils.encryption import encrypt, hash_email, decrypt_many
+from utils.user_profile import profile_cache
 from bson.objectid import ObjectId
 import traceback
-from extensions import mongo
+from extensions import mongo, limiter
+from utils.rate_limit import configured_limit
+from utils.archive import ARCHIVE_COLLECTION
 from flask import current_app as app
 
 # Collections
 users_collection = mongo.db.users
+bookings_collection = mongo.db.bookings
+archive_collection = mongo.db[ARCHIVE_COLLECTION]
 # Optional: try to import model validators (may be absent)
 try:
     from models.user import validate_user, normalize_provider_location
@@ -22,9 +27,15 @@ from datetime import timedelta
 auth_bp = Blueprint('auth', __name__)
 CORS(auth_bp, resources={r"/api/*": {"origins": "*"}})
 
+# Hashing pool is saturated: fail fast so other routes keep their workers
+def _hasher_busy(e):
+    response = jsonify({"msg": "Too many sign-in requests right now, please retry shortly"})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
 # Signup Endpoint: Register a new user (Limit to 5 attempts per minute per IP)
 @auth_bp.route('/register', methods=['POST'])
-# @limiter.limit("5 per minute")
+@limiter.limit(configured_limit("RATE_LIMIT_REGISTER", "5 per minute"))
 def register():
     data = request.get_json()
     email = data.get('email')
@@ -42,7 +53,10 @@ def register():
         return jsonify({"msg": "User already exists"}), 409
 
     # Hash the user's password before saving
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HasherBusy as e:
+        return _hasher_busy(e)
 
     encrypted_email = encrypt(email)
 
@@ -59,7 +73,7 @@ def register():
 
 # Login Endpoint: Authenticate user and return JWT token (Limit to 10 attempts per minute per IP)
 @auth_bp.route('/login', methods=['POST'])
-# @limiter.limit("10 per minute")
+@limiter.limit(configured_limit("RATE_LIMIT_LOGIN", "10 per minute"))
 def login():
     data = request.get_json()
     email = data.get('email')
@@ -73,8 +87,22 @@ def login():
 
     # Find the user in the database
     user = users_collection.find_one({"emailHash": emailHash})
-    if not user or not check_password_hash(user['password'], password):
+    if not user:
         return jsonify({"msg": "Invalid credentials"}), 401
+    try:
+        if not password_hasher.verify(user['password'], password):
+            return jsonify({"msg": "Invalid credentials"}), 401
+    except HasherBusy as e:
+        return _hasher_busy(e)
+
+    # Upgrade hashes made with an older method or cost, off the request path;
+    # the filter keeps a concurrent password change from being overwritten
+    if password_hasher.needs_rehash(user['password']):
+        old_hash = user['password']
+        password_hasher.rehash_later(password, lambda new_hash: users_collection.update_one(
+            {"_id": user["_id"], "password": old_hash},
+            {"$set": {"password": new_hash}}
+        ))
 
     # Create tokens with expiration times
     access_token = create_access_token(
@@ -86,21 +114,9 @@ def login():
         expires_delta=timedelta(days=30)  # Refresh token expires in 30 days
     )
     
-    # Prepare user data for frontend - send the entire user schema
-    user_data = {
-        "id": str(user["_id"]),
-        "name": user.get("name"),
-        "email": decrypt(user.get("email")) if user.get("email") else None,
-        "age": user.get("age"),
-        "contact_no": user.get("contact_no"),
-        "role": user.get("role"),
-    }
-    
-    # Add role-specific details if they exist
-    if user.get("role") == "provider" and user.get("providerDetails"):
-        user_data["providerDetails"] = user.get("providerDetails")
-    elif user.get("role") == "consumer" and user.get("consumerDetails"):
-        user_data["consumerDetails"] = user.get("consumerDetails")
+    # Prepare user data for frontend (built from the document we already have,
+    # and cached so the hourly /refresh does not read or decrypt again)
+    user_data = profile_cache.put(user)
     
     return jsonify({
         "access_token": access_token, 
@@ -124,28 +140,12 @@ def refresh():
         expires_delta=timedelta(hours=1)  # New access token expires in 1 hour
     )
     
-    # Get the updated user information
-    user = users_collection.find_one({"_id": ObjectId(current_user)})
+    # Get the user information (cached profile view)
+    user_data = profile_cache.get(users_collection, current_user)
     
-    if not user:
+    if not user_data:
         return jsonify({"msg": "User not found"}), 404
         
-    # Prepare user data for frontend
-    user_data = {
-        "id": str(user["_id"]),
-        "name": user.get("name"),
-        "email": decrypt(user.get("email")) if user.get("email") else None,
-        "age": user.get("age"),
-        "contact_no": user.get("contact_no"),
-        "role": user.get("role"),
-    }
-    
-    # Add role-specific details if they exist
-    if user.get("role") == "provider" and user.get("providerDetails"):
-        user_data["providerDetails"] = user.get("providerDetails")
-    elif user.get("role") == "consumer" and user.get("consumerDetails"):
-        user_data["consumerDetails"] = user.get("consumerDetails")
-        
     return jsonify({
         "access_token": new_access_token,
         "user": user_data
@@ -190,7 +190,10 @@ def save_user_details():
             user_update["emailHash"] = hash_email(email)
         
         if password is not None:
-            user_update["password"] = generate_password_hash(password)
+            try:
+                user_update["password"] = password_hasher.hash(password)
+            except HasherBusy as e:
+                return _hasher_busy(e)
             
         if age is not None:
             user_update["age"] = age
@@ -260,26 +263,11 @@ def save_user_details():
         if result.matched_count == 0:
             return jsonify({"msg": "User not found"}), 404
 
-        # Fetch the updated user document to return
-        updated_user = users_collection.find_one({"_id": user_object_id})
-        if not updated_user:
+        # Drop the cached profile, then rebuild it from the updated document
+        profile_cache.invalidate(user_id)
+        user_data = profile_cache.get(users_collection, user_id)
+        if not user_data:
             return jsonify({"msg": "User found but could not retrieve updated data"}), 500
-            
-        # Prepare user data for frontend
-        user_data = {
-            "id": str(updated_user["_id"]),
-            "name": updated_user.get("name"),
-            "email": decrypt(updated_user.get("email")) if updated_user.get("email") else None,
-            "age": updated_user.get("age"),
-            "contact_no": updated_user.get("contact_no"),
-            "role": updated_user.get("role"),
-        }
-        
-        # Add role-specific details if they exist
-        if updated_user.get("role") == "provider" and updated_user.get("providerDetails"):
-            user_data["providerDetails"] = updated_user.get("providerDetails")
-        elif updated_user.get("role") == "consumer" and updated_user.get("consumerDetails"):
-            user_data["consumerDetails"] = updated_user.get("consumerDetails")
 
         return jsonify({
             "msg": "User details updated successfully", 
@@ -291,3 +279,97 @@ def save_user_details():
         app.logger.error(f"Error in save_user_details: {str(e)}")
         app.logger.error(traceback.format_exc())
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
+
+# Fields /batch can return. Public fields are visible to any signed-in user;
+# personal ones only for yourself and users you have a booking with.
+USER_PUBLIC_FIELDS = ("name", "role", "providerDetails")
+USER_PERSONAL_FIELDS = ("email", "contact_no", "age", "consumerDetails")
+MAX_BATCH_USERS = 100
+
+# Ids of users in `user_ids` that share at least one booking (hot or archived) with `user_id`
+def _counterparties(user_id, user_ids):
+    me = ObjectId(user_id)
+    query = {"$or": [
+        {"consumer_id": me, "provider_id": {"$in": user_ids}},
+        {"provider_id": me, "consumer_id": {"$in": user_ids}}
+    ]}
+    related = set()
+    for collection in (bookings_collection, archive_collection):
+        for booking in collection.find(query, {"consumer_id": 1, "provider_id": 1, "_id": 0}):
+            related.add(booking["consumer_id"])
+            related.add(booking["provider_id"])
+        # Skip the archive once every requested user is already related
+        if related.issuperset(user_ids):
+            break
+    related.discard(me)
+    return related
+
+# Look up many users at once
+# GET ?ids=<id>,<id>&fields=name,email  or  POST {"ids": [...], "fields": [...]}
+# Returns {"users": {id: {...requested fields}}, "missing": [ids not found]}
+@auth_bp.route('/batch', methods=['GET', 'POST'])
+@jwt_required()
+def get_users_batch():
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            ids = data.get('ids') or []
+            fields = data.get('fields', ["name", "role"])
+        else:
+            ids = [i for i in request.args.get('ids', '').split(',') if i]
+            fields = [f for f in request.args.get('fields', 'name,role').split(',') if f]
+        
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"msg": "ids must be a non-empty list"}), 400
+        if len(ids) > MAX_BATCH_USERS:
+            return jsonify({"msg": f"At most {MAX_BATCH_USERS} ids per request"}), 400
+        if not isinstance(fields, list) or not fields or not all(isinstance(f, str) for f in fields):
+            return jsonify({"msg": "fields must be a non-empty list of field names"}), 400
+        invalid = [f for f in fields if f not in USER_PUBLIC_FIELDS + USER_PERSONAL_FIELDS]
+        if invalid:
+            return jsonify({"msg": f"Unknown fields: {', '.join(invalid)}"}), 400
+        bad_ids = [i for i in ids if not ObjectId.is_valid(str(i))]
+        if bad_ids:
+            return jsonify({"msg": "Invalid user id", "ids": bad_ids}), 400
+        
+        user_id = get_jwt_identity()
+        object_ids = list({ObjectId(str(i)) for i in ids})
+        personal = [f for f in fields if f in USER_PERSONAL_FIELDS]
+        allowed = set()
+        if personal:
+            allowed = _counterparties(user_id, object_ids)
+            allowed.add(ObjectId(user_id))
+        
+        # One query for every user, reading only the requested fields
+        users = list(users_collection.find({"_id": {"$in": object_ids}}, {f: 1 for f in fields}))
+        
+        # Decrypt just the emails that will be returned, in one batch
+        email_docs = [u for u in users if "email" in fields and u["_id"] in allowed and u.get("email")]
+        for user, email in zip(email_docs, decrypt_many([u["email"] for u in email_docs])):
+            user["email"] = email
+        
+        result = {}
+        for user in users:
+            visible = fields if user["_id"] in allowed else [f for f in fields if f in USER_PUBLIC_FIELDS]
+            result[str(user["_id"])] = {f: user.get(f) for f in visible}
+        
+        return jsonify({
+            "users": result,
+            "missing": [str(i) for i in object_ids if str(i) not in result]
+        }), 200
+        
+    except Exception as e:
+        app.logger.error(f"Error in get_users_batch: {str(e)}")
+        return jsonify({"msg": "Failed to fetch users", "error": str(e)}), 500
+
+# Profile cache hit/miss counters
+@auth_bp.route('/profile-cache/stats', methods=['GET'])
+@jwt_required()
+def get_profile_cache_stats():
+    return jsonify(profile_cache.stats()), 200
+
+# Password hashing pool metrics (queue depth, rejections, latency)
+@auth_bp.route('/hashing/stats', methods=['GET'])
+@jwt_required()
+def get_hashing_stats():
+    return jsonify(password_hasher.stats()), 200
@@ -1,14 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
 import traceback
-from datetime import datetime, timedelta
-from pymongo.errors import PyMongoError
+import itertools
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError, DuplicateKeyError, BulkWriteError
+from dateutil.relativedelta import relativedelta
 from flask_cors import CORS
 
 # Import app and db
 from extensions import mongo
 from flask import current_app as app
+from utils.cache import service_cache, MemoryBackend
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.auto_complete import auto_complete_bookings as run_auto_complete
+from utils.ratings import apply_rating_change
+from utils.user_profile import profile_cache
+from utils.availability import ProviderCalendar, slot_start_for, slot_for_status, to_naive_utc
+from utils.idempotency import idempotent
+from utils.streaming import stream_csv, stream_ndjson, wants_ndjson, NDJSON_MIMETYPE
+from models.booking import validate_booking
+from utils.archive import ARCHIVE_COLLECTION, union_archive, wants_archive
+from utils.analytics import ROLLUP_COLLECTION, apply_rollup_incs, status_change_inc, rating_change_inc, provider_summary
 
 # Initialize bookings blueprint
 bookings_bp = Blueprint('bookings', __name__)
@@ -18,10 +32,80 @@ CORS(bookings_bp, resources={r"/api/*": {"origins": "*"}})
 bookings_collection = mongo.db.bookings
 users_collection = mongo.db.users
 services_collection = mongo.db.services
+archive_collection = mongo.db[ARCHIVE_COLLECTION]
+rollups_collection = mongo.db[ROLLUP_COLLECTION]
+
+# Upcoming booked slots per provider, for availability views
+provider_calendar = ProviderCalendar(bookings_collection)
+
+# Fold booking changes into the provider analytics rollups. build_changes
+# returns the (booking, $inc) pairs and runs inside the guard too, so neither
+# a bad stored value nor a rollup write failure can fail a booking write that
+# already happened; scripts/backfill_analytics.py rebuilds the rollups.
+def _record_rollups(build_changes):
+    try:
+        apply_rollup_incs(rollups_collection, build_changes())
+    except Exception as e:
+        app.logger.error(f"Error updating analytics rollups: {str(e)}")
+
+# Rollups for (booking, old_status, new_status) transitions; old_status is None for new bookings
+def _record_status_rollups(transitions):
+    _record_rollups(lambda: [
+        (booking, status_change_inc(booking, old_status, new_status))
+        for booking, old_status, new_status in transitions
+    ])
+
+def _slot_config():
+    return (
+        app.config.get("BOOKING_SLOT_MINUTES", 60),
+        app.config.get("BOOKING_UTC_OFFSET_MINUTES", 0)
+    )
+
+# Load a service for booking views, read through the shared service cache
+def _get_service(service_id):
+    def _load():
+        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        if service:
+            service['_id'] = str(service['_id'])
+        return service
+    return service_cache.get_service(str(service_id), _load)
+
+# Parse the ISO datetime the frontend sends; None if it is invalid
+def _parse_booking_datetime(value):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+# Build a booking document from a request item and its (already loaded) service
+def _build_booking(data, consumer_id, service, booking_datetime):
+    return {
+        "service_id": ObjectId(service["_id"]),
+        "service_title": service.get("title", "Unknown Service"),
+        "price": service.get("price"),  # Price at booking time, for revenue analytics
+        "consumer_id": ObjectId(consumer_id),
+        "consumer_name": data.get("client_name"),
+        "consumer_email": data.get("client_email"),
+        "contact_number": data.get("contact_number"),
+        "provider_id": ObjectId(service.get("created_by")),
+        "booking_date": booking_datetime.strftime('%Y-%m-%d'),
+        "booking_time": booking_datetime.strftime('%H:%M'),
+        "booking_datetime": booking_datetime,
+        "scheduled_at": booking_datetime,  # Canonical field used by the auto-complete sweep
+        # Unique per provider while the booking is active (see ensure_booking_indexes)
+        "slot_start": slot_start_for(booking_datetime, *_slot_config()),
+        "status": "pending",  # Default status is pending
+        "created_at": datetime.now(),
+        "special_instructions": data.get("special_instructions") or "",
+        "notes": data.get("notes", ""),
+        **({"series_id": data["series_id"]} if data.get("series_id") else {})
+    }
 
 # Create a new booking
+# Retries that send the same Idempotency-Key header get the stored response back
 @bookings_bp.route('/create', methods=['POST'])
 @jwt_required()
+@idempotent(mongo.db.idempotency_keys)
 def create_booking():
     try:
         data = request.get_json()
@@ -40,38 +124,26 @@ def create_booking():
             return jsonify({"msg": "Missing required fields"}), 400
         
         # Get service details and verify it exists
-        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        service = _get_service(service_id)
         if not service:
             return jsonify({"msg": "Service not found"}), 404
         
         # Extract date and time from the ISO string (frontend sends combined datetime)
-        try:
-            booking_datetime = datetime.fromisoformat(booking_date.replace('Z', '+00:00'))
-            formatted_date = booking_datetime.strftime('%Y-%m-%d')
-            formatted_time = booking_datetime.strftime('%H:%M')
-        except:
+        booking_datetime = _parse_booking_datetime(booking_date)
+        if booking_datetime is None:
             return jsonify({"msg": "Invalid booking date format"}), 400
         
         # Add consumer and provider details
-        booking = {
-            "service_id": ObjectId(service_id),
-            "service_title": service.get("title", "Unknown Service"),
-            "consumer_id": ObjectId(consumer_id),
-            "consumer_name": client_name,
-            "consumer_email": client_email,
-            "contact_number": contact_number,
-            "provider_id": ObjectId(service.get("created_by")),
-            "booking_date": formatted_date,
-            "booking_time": formatted_time,
-            "booking_datetime": booking_datetime,
-            "status": "Pending",  # Default status is Pending
-            "created_at": datetime.now(),
-            "special_instructions": special_instructions or "",
-            "notes": data.get("notes", "")
-        }
+        booking = _build_booking(data, consumer_id, service, booking_datetime)
         
         # Insert the booking
-        result = bookings_collection.insert_one(booking)
+        try:
+            result = bookings_collection.insert_one(booking)
+        except DuplicateKeyError:
+            return jsonify({"msg": "The provider is already booked for this time slot"}), 409
+        provider_count_cache.delete(str(booking["provider_id"]))
+        provider_calendar.add(booking["provider_id"], booking["slot_start"])
+        _record_status_rollups([(booking, None, booking["status"])])
         
         # Format the response to match what frontend expects
         response_data = {
@@ -87,7 +159,7 @@ def create_booking():
             "booking_date": booking_date,
             "contact_number": contact_number,
             "special_instructions": special_instructions,
-            "status": "Pending",
+            "status": "pending",
             "created_at": datetime.now().isoformat()
         }
         
@@ -98,7 +170,227 @@ def create_booking():
         app.logger.error(traceback.format_exc())
         return jsonify({"msg": "Failed to create booking", "error": str(e)}), 500
 
+BOOKING_STATUSES = ["pending", "confirmed", "completed", "cancelled"]
+
+# Upper bound on bookings created by one bulk or recurring request
+MAX_BATCH_BOOKINGS = 100
+
+def _create_bookings(items, consumer_id):
+    """
+    Create many bookings in one pass and return per-item results.
+
+    Every item is validated first, each distinct service is loaded once,
+    slot conflicts with existing bookings are found with one query, and the
+    remaining bookings are written with one unordered insert_many. Items
+    that lose a race for a slot come back as conflicts from the unique
+    (provider_id, slot_start) index.
+    """
+    results = [None] * len(items)
+    parsed = {}
+
+    # Validate items and parse their dates
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"index": i, "status": 400, "msg": "Each booking must be an object"}
+            continue
+        if not item.get("service") or not item.get("booking_date") or not item.get("client_email"):
+            results[i] = {"index": i, "status": 400, "msg": "Missing required fields"}
+            continue
+        if not ObjectId.is_valid(item["service"]):
+            results[i] = {"index": i, "status": 400, "msg": "Invalid service id"}
+            continue
+        booking_datetime = _parse_booking_datetime(item["booking_date"])
+        if booking_datetime is None:
+            results[i] = {"index": i, "status": 400, "msg": "Invalid booking date format"}
+            continue
+        parsed[i] = booking_datetime
+
+    # Resolve every distinct service once
+    service_ids = {ObjectId(items[i]["service"]) for i in parsed}
+    services = {
+        str(service["_id"]): service
+        for service in services_collection.find(
+            {"_id": {"$in": list(service_ids)}}, {"title": 1, "created_by": 1, "price": 1}
+        )
+    }
+
+    docs = []
+    doc_index = []
+    for i, booking_datetime in parsed.items():
+        service = services.get(str(items[i]["service"]))
+        if not service:
+            results[i] = {"index": i, "status": 404, "msg": "Service not found"}
+            continue
+        booking = _build_booking(items[i], consumer_id, service, booking_datetime)
+        errors = validate_booking({
+            "service_id": str(booking["service_id"]),
+            "consumer_id": str(booking["consumer_id"]),
+            "provider_id": str(booking["provider_id"]),
+            "scheduled_at": booking["scheduled_at"],
+            "status": booking["status"]
+        })
+        if errors:
+            results[i] = {"index": i, "status": 400, "msg": "Invalid booking", "errors": errors}
+            continue
+        docs.append(booking)
+        doc_index.append(i)
+
+    # Find slot conflicts with existing bookings (and within this batch) in one query
+    slots_by_provider = {}
+    for booking in docs:
+        slots_by_provider.setdefault(booking["provider_id"], set()).add(booking["slot_start"])
+    taken = set()
+    if slots_by_provider:
+        cursor = bookings_collection.find(
+            {"$or": [
+                {"provider_id": provider_id, "slot_start": {"$in": list(slots)}}
+                for provider_id, slots in slots_by_provider.items()
+            ]},
+            {"provider_id": 1, "slot_start": 1, "_id": 0}
+        )
+        taken = {(doc["provider_id"], doc["slot_start"]) for doc in cursor}
+
+    to_insert = []
+    insert_index = []
+    for booking, i in zip(docs, doc_index):
+        slot = (booking["provider_id"], booking["slot_start"])
+        if slot in taken:
+            results[i] = {"index": i, "status": 409, "msg": "The provider is already booked for this time slot"}
+            continue
+        taken.add(slot)
+        to_insert.append(booking)
+        insert_index.append(i)
+
+    failed = {}
+    if to_insert:
+        try:
+            bookings_collection.insert_many(to_insert, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = error
+
+    created = []
+    for pos, (booking, i) in enumerate(zip(to_insert, insert_index)):
+        error = failed.get(pos)
+        if error is None:
+            results[i] = {"index": i, "status": 201, "booking_id": str(booking["_id"]),
+                          "booking_date": booking["scheduled_at"].isoformat()}
+            provider_count_cache.delete(str(booking["provider_id"]))
+            provider_calendar.add(booking["provider_id"], booking["slot_start"])
+            created.append((booking, None, booking["status"]))
+        elif error.get("code") == 11000:
+            results[i] = {"index": i, "status": 409, "msg": "The provider is already booked for this time slot"}
+        else:
+            results[i] = {"index": i, "status": 500, "msg": error.get("errmsg", "Insert failed")}
+    if created:
+        _record_status_rollups(created)
+    return results
+
+# Summarise per-item results: 201 if all were created, 207 if some were, 400 otherwise
+def _batch_response(results, **extra):
+    created = sum(1 for r in results if r["status"] == 201)
+    status = 201 if created == len(results) else (207 if created else 400)
+    return jsonify({
+        "msg": f"Created {created} of {len(results)} bookings",
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+        **extra
+    }), status
+
+# Create many bookings at once
+# Body: {"bookings": [{service, booking_date, client_name, client_email, contact_number, ...}, ...]}
+@bookings_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@idempotent(mongo.db.idempotency_keys)
+def create_bookings_bulk():
+    try:
+        data = request.get_json() or {}
+        items = data.get("bookings")
+        if not isinstance(items, list) or not items:
+            return jsonify({"msg": "bookings must be a non-empty list"}), 400
+        if len(items) > MAX_BATCH_BOOKINGS:
+            return jsonify({"msg": f"At most {MAX_BATCH_BOOKINGS} bookings per request"}), 400
+
+        return _batch_response(_create_bookings(items, get_jwt_identity()))
+
+    except Exception as e:
+        app.logger.error(f"Error creating bulk bookings: {str(e)}")
+        app.logger.error(traceback.format_exc())
+        return jsonify({"msg": "Failed to create bookings", "error": str(e)}), 500
+
+# Recurrence steps supported by /recurring
+RECURRENCE_STEPS = {
+    "daily": lambda n: relativedelta(days=n),
+    "weekly": lambda n: relativedelta(weeks=n),
+    "monthly": lambda n: relativedelta(months=n)
+}
+
+# Create a series of bookings for one service
+# Body: the /create fields, where booking_date is the first occurrence, plus
+# "recurrence": {"frequency": "daily"|"weekly"|"monthly", "interval": 1,
+#                "count": N, or "until": ISO datetime}
+@bookings_bp.route('/recurring', methods=['POST'])
+@jwt_required()
+@idempotent(mongo.db.idempotency_keys)
+def create_recurring_bookings():
+    try:
+        data = request.get_json() or {}
+        rule = data.get("recurrence") or {}
+
+        step = RECURRENCE_STEPS.get(rule.get("frequency"))
+        if step is None:
+            return jsonify({"msg": f"recurrence.frequency must be one of {list(RECURRENCE_STEPS)}"}), 400
+        first = _parse_booking_datetime(data.get("booking_date"))
+        if first is None:
+            return jsonify({"msg": "Invalid booking date format"}), 400
+        try:
+            interval = int(rule.get("interval", 1))
+            count = int(rule["count"]) if rule.get("count") is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"msg": "recurrence.interval and recurrence.count must be integers"}), 400
+        until = _parse_booking_datetime(rule["until"]) if rule.get("until") else None
+        if interval < 1 or (count is None and until is None) or (count is not None and count < 1):
+            return jsonify({"msg": "recurrence needs interval >= 1 and a positive count or an until date"}), 400
+        if until is not None and (until.tzinfo is None) != (first.tzinfo is None):
+            return jsonify({"msg": "booking_date and recurrence.until must both include a timezone or neither"}), 400
+
+        # Expand the rule into occurrences
+        occurrences = []
+        n = 0
+        while len(occurrences) <= MAX_BATCH_BOOKINGS:
+            occurrence = first + step(interval * n)
+            if (count is not None and n >= count) or (until is not None and occurrence > until):
+                break
+            occurrences.append(occurrence)
+            n += 1
+        if len(occurrences) > MAX_BATCH_BOOKINGS:
+            return jsonify({"msg": f"A series can have at most {MAX_BATCH_BOOKINGS} occurrences"}), 400
+
+        series_id = ObjectId()
+        items = [
+            dict(data, booking_date=occurrence.isoformat(), series_id=series_id)
+            for occurrence in occurrences
+        ]
+        return _batch_response(_create_bookings(items, get_jwt_identity()), series_id=str(series_id))
+
+    except Exception as e:
+        app.logger.error(f"Error creating recurring bookings: {str(e)}")
+        app.logger.error(traceback.format_exc())
+        return jsonify({"msg": "Failed to create recurring bookings", "error": str(e)}), 500
+
+# Fields of the joined service document that the booking history view uses
+HISTORY_SERVICE_FIELDS = ("title", "description", "price", "provider_name")
+
+# Convert a datetime to ISO format for JSON, leaving other values untouched
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
 # Get consumer's booking history (bookings made by the user)
+# Returns every booking as an array by default. With ?limit= (and ?cursor=
+# from a previous page) returns {"bookings": [...], "next_cursor": ...},
+# newest first, keyed on (created_at, _id). ?include_archive=true also
+# returns bookings that have been moved to the archive.
 @bookings_bp.route('/consumer-history', methods=['GET'])
 @jwt_required()
 def get_consumer_bookings():
@@ -114,31 +406,84 @@ def get_consumer_bookings():
         if client_email:
             # If client_email is provided, use that instead
             query = {"consumer_email": client_email}
-        
-        # Query bookings for this consumer
-        cursor = bookings_collection.find(query).sort("created_at", -1)  # Sort by newest first
+
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        limit = None
+        if paginate:
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                token = request.args.get('cursor')
+                if token:
+                    last_created, last_id = decode_cursor(token, (datetime, ObjectId))
+                    query = {"$and": [query, {"$or": [
+                        {"created_at": {"$lt": last_created}},
+                        {"created_at": last_created, "_id": {"$lt": last_id}}
+                    ]}]}
+            except ValueError as e:
+                return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+        # One aggregation joins each booking with its service instead of a
+        # find_one per booking, and projects only the fields the view needs
+        newest_first = {"$sort": {"created_at": -1, "_id": -1}}
+        # Fetch one extra booking to know whether another page exists
+        page_limit = [{"$limit": limit + 1}] if limit else []
+        pipeline = [{"$match": query}]
+        if wants_archive(request):
+            pipeline += [newest_first, *page_limit, union_archive(query, newest_first, *page_limit)]
+        pipeline += [newest_first, *page_limit]  # Sort by newest first
+        pipeline += [
+            {"$lookup": {
+                "from": "services",
+                "localField": "service_id",
+                "foreignField": "_id",
+                "as": "service"
+            }},
+            {"$project": {
+                "consumer_id": 1,
+                "service_id": 1,
+                "service_title": 1,
+                "booking_date": 1,
+                "booking_time": 1,
+                "booking_datetime": 1,
+                "created_at": 1,
+                "status": 1,
+                "service": {f: {"$arrayElemAt": [f"$service.{f}", 0]} for f in HISTORY_SERVICE_FIELDS}
+            }}
+        ]
+        docs = list(bookings_collection.aggregate(pipeline))
+
+        next_cursor = None
+        if limit and len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1].get('created_at'), docs[-1]['_id'])
         
         # Process bookings for JSON serialization
         bookings = []
-        for booking in cursor:
-            # Get service details to match frontend expectations
-            service = services_collection.find_one({"_id": booking["service_id"]})
+        for booking in docs:
+            # The service may have been deleted since the booking was made
+            service = booking.get('service') or {}
             
             booking_json = {
                 '_id': str(booking['_id']),
                 'consumer_id': str(booking['consumer_id']),
-                'booking_date': booking['booking_date'],
+                'booking_date': booking.get('booking_date'),
+                'booking_time': booking.get('booking_time'),
+                'booking_datetime': _iso(booking.get('booking_datetime')),
                 'status': booking.get('status', 'Pending'),
                 # This is the critical part: frontend expects a service object with a title
                 'service': {
                     '_id': str(booking['service_id']),
                     'title': booking.get('service_title', service.get('title', 'Unknown Service')),
                     'description': service.get('description', ''),
-                    'price': service.get('price', 0)
+                    'price': service.get('price', 0),
+                    'provider_name': service.get('provider_name')
                 }
             }
             bookings.append(booking_json)
         
+        if paginate:
+            return jsonify({"bookings": bookings, "next_cursor": next_cursor}), 200
+
         # IMPORTANT: Return the array directly, not wrapped in an object
         return jsonify(bookings), 200
         
@@ -147,43 +492,110 @@ def get_consumer_bookings():
         app.logger.error(traceback.format_exc())
         return jsonify({"msg": "Failed to fetch booking history", "error": str(e)}), 500
 
+# Convert ObjectIds and created_at to JSON-friendly strings
+def _serialize_booking(booking):
+    booking['_id'] = str(booking['_id'])
+    booking['service_id'] = str(booking['service_id'])
+    booking['consumer_id'] = str(booking['consumer_id'])
+    booking['provider_id'] = str(booking['provider_id'])
+    
+    # Convert datetime to string
+    if isinstance(booking.get('created_at'), datetime):
+        booking['created_at'] = booking['created_at'].isoformat()
+    return booking
+
+# Provider booking totals, cached per process so page turns don't recount.
+# create_booking drops the entry for its provider; other workers' writes show
+# up within BOOKING_COUNT_TTL seconds. Archived totals only change when the
+# archive job runs, so they are cached under their own key.
+provider_count_cache = MemoryBackend(max_entries=4096)
+
+def _provider_booking_count(provider_id, include_archive=False):
+    key = str(provider_id)
+    total = provider_count_cache.get(key)
+    if total is None:
+        total = bookings_collection.count_documents({"provider_id": ObjectId(provider_id)})
+        provider_count_cache.set(key, total, app.config.get("BOOKING_COUNT_TTL", 60))
+    if include_archive:
+        archived = provider_count_cache.get(f"{key}:archive")
+        if archived is None:
+            archived = archive_collection.count_documents({"provider_id": ObjectId(provider_id)})
+            provider_count_cache.set(f"{key}:archive", archived, app.config.get("BOOKING_COUNT_TTL", 60))
+        total += archived
+    return total
+
 # Get provider's booking history (bookings for provider's services)
+# ?page=&per_page= returns the page-number shape. Passing ?cursor= (empty for
+# the first page) switches to (created_at, _id) keyset paging, which costs
+# the same on every page; pagination.next_cursor is null on the last page.
+# ?include_archive=true merges in archived bookings.
 @bookings_bp.route('/provider-history', methods=['GET'])
 @jwt_required()
 def get_provider_bookings():
     try:
         provider_id = get_jwt_identity()
+        query = {"provider_id": ObjectId(provider_id)}
         
         # Optional: Add pagination
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
-        skip = (page - 1) * per_page
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+            per_page = parse_limit(request.args.get('per_page'), default=10)
+            keyset = 'cursor' in request.args
+            token = request.args.get('cursor')
+            if token:
+                last_created, last_id = decode_cursor(token, (datetime, ObjectId))
+                query["$or"] = [
+                    {"created_at": {"$lt": last_created}},
+                    {"created_at": last_created, "_id": {"$lt": last_id}}
+                ]
+        except ValueError as e:
+            return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
         
-        # Query bookings for this provider
-        cursor = bookings_collection.find(
-            {"provider_id": ObjectId(provider_id)}
-        ).sort("created_at", -1)  # Sort by newest first
+        # Query bookings for this provider, newest first
+        # (served by the (provider_id, created_at, _id) index)
+        include_archive = wants_archive(request)
+        cursor = bookings_collection.find(query).sort([("created_at", -1), ("_id", -1)])
         
-        # Count total before pagination for metadata
-        total_bookings = bookings_collection.count_documents({"provider_id": ObjectId(provider_id)})
+        # Count total for metadata (cached between page turns)
+        total_bookings = _provider_booking_count(provider_id, include_archive)
+
+        if include_archive:
+            # Merge the hot and archived pages; each side only returns what the page can use
+            newest_first = {"$sort": {"created_at": -1, "_id": -1}}
+            window = {"$limit": per_page + 1 if keyset else page * per_page}
+            cursor = bookings_collection.aggregate([
+                {"$match": query}, newest_first, window,
+                union_archive(query, newest_first, window),
+                newest_first
+            ])
+            if not keyset:
+                cursor = iter(list(cursor)[(page - 1) * per_page:])
+
+        if keyset:
+            # Fetch one extra booking to know whether another page exists
+            bookings = list(cursor)[:per_page + 1] if include_archive else list(cursor.limit(per_page + 1))
+            next_cursor = None
+            if len(bookings) > per_page:
+                bookings = bookings[:per_page]
+                next_cursor = encode_cursor(bookings[-1].get('created_at'), bookings[-1]['_id'])
+            return jsonify({
+                "bookings": [_serialize_booking(b) for b in bookings],
+                "pagination": {
+                    "total": total_bookings,
+                    "per_page": per_page,
+                    "next_cursor": next_cursor
+                }
+            }), 200
         
         # Apply pagination
-        bookings = list(cursor.skip(skip).limit(per_page))
-        
-        # Process bookings for JSON serialization
-        for booking in bookings:
-            booking['_id'] = str(booking['_id'])
-            booking['service_id'] = str(booking['service_id'])
-            booking['consumer_id'] = str(booking['consumer_id'])
-            booking['provider_id'] = str(booking['provider_id'])
-            
-            # Convert datetime to string
-            if isinstance(booking.get('created_at'), datetime):
-                booking['created_at'] = booking['created_at'].isoformat()
+        if include_archive:
+            bookings = list(cursor)[:per_page]
+        else:
+            bookings = list(cursor.skip((page - 1) * per_page).limit(per_page))
         
         # Return with pagination metadata
         return jsonify({
-            "bookings": bookings,
+            "bookings": [_serialize_booking(b) for b in bookings],
             "pagination": {
                 "total": total_bookings,
                 "page": page,
@@ -197,6 +609,113 @@ def get_provider_bookings():
         app.logger.error(traceback.format_exc())
         return jsonify({"msg": "Failed to fetch booking history", "error": str(e)}), 500
 
+# Columns written by the provider export, in order
+EXPORT_FIELDS = [
+    "_id", "scheduled_at", "status", "service_id", "service_title",
+    "consumer_name", "consumer_email", "contact_number", "created_at", "feedback_rating"
+]
+
+def _export_row(booking):
+    row = {field: booking.get(field) for field in EXPORT_FIELDS}
+    for field in ("_id", "service_id"):
+        row[field] = str(row[field]) if row[field] is not None else None
+    for field in ("scheduled_at", "created_at"):
+        if isinstance(row[field], datetime):
+            row[field] = row[field].isoformat()
+    row["feedback_rating"] = (booking.get("feedback") or {}).get("rating")
+    return row
+
+# Export every booking of the current provider, streamed as CSV or NDJSON
+# Query params: format=csv|ndjson (default csv), from/to (ISO dates on
+# scheduled_at, to is exclusive), status (comma-separated), include_archive
+# (archived bookings are streamed first, as they are the oldest)
+@bookings_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_provider_bookings():
+    try:
+        provider_id = get_jwt_identity()
+        query = {"provider_id": ObjectId(provider_id)}
+        
+        scheduled = {}
+        for param, op in (("from", "$gte"), ("to", "$lt")):
+            if request.args.get(param):
+                value = _parse_booking_datetime(request.args[param])
+                if value is None:
+                    return jsonify({"msg": f"Invalid {param} date"}), 400
+                scheduled[op] = to_naive_utc(value)
+        if scheduled:
+            query["scheduled_at"] = scheduled
+        
+        if request.args.get("status"):
+            statuses = [s.strip() for s in request.args["status"].split(",") if s.strip()]
+            invalid = [s for s in statuses if s not in BOOKING_STATUSES]
+            if invalid:
+                return jsonify({"msg": f"Invalid status value: {', '.join(invalid)}"}), 400
+            query["status"] = {"$in": statuses}
+        
+        # Served by the (provider_id, scheduled_at) index; the cursor pulls
+        # EXPORT_BATCH_SIZE rows per round trip while the response streams
+        projection = {field: 1 for field in EXPORT_FIELDS if field != "feedback_rating"}
+        projection["feedback.rating"] = 1
+        batch_size = app.config.get("EXPORT_BATCH_SIZE", 1000)
+        sources = [archive_collection, bookings_collection] if wants_archive(request) else [bookings_collection]
+        cursor = itertools.chain.from_iterable(
+            source.find(query, projection).sort([("scheduled_at", 1), ("_id", 1)]).batch_size(batch_size)
+            for source in sources
+        )
+        
+        if wants_ndjson(request):
+            body, mimetype, extension = stream_ndjson(cursor, _export_row), NDJSON_MIMETYPE, "ndjson"
+        else:
+            body, mimetype, extension = stream_csv(cursor, EXPORT_FIELDS, _export_row), "text/csv", "csv"
+        
+        filename = f"bookings-{datetime.now().strftime('%Y%m%d')}.{extension}"
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        ), 200
+        
+    except Exception as e:
+        app.logger.error(f"Error exporting bookings: {str(e)}")
+        return jsonify({"msg": "Failed to export bookings", "error": str(e)}), 500
+
+# Provider dashboard: bookings by status, revenue and ratings per day
+# Query params: from/to (ISO dates, inclusive, on scheduled date) or
+# days (default 30, max 366) ending today. Served from the daily rollups.
+@bookings_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def get_provider_analytics():
+    try:
+        provider_id = get_jwt_identity()
+        # Buckets are UTC days
+        today = to_naive_utc(datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        try:
+            days = int(request.args.get('days', 30))
+        except ValueError:
+            return jsonify({"msg": "days must be an integer"}), 400
+        end = today + timedelta(days=1)
+        start = end - timedelta(days=max(1, min(days, 366)))
+        for param in ("from", "to"):
+            if request.args.get(param):
+                value = _parse_booking_datetime(request.args[param])
+                if value is None:
+                    return jsonify({"msg": f"Invalid {param} date"}), 400
+                value = to_naive_utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+                if param == "from":
+                    start = value
+                else:
+                    end = value + timedelta(days=1)
+        if end <= start or (end - start).days > 366:
+            return jsonify({"msg": "The date range must cover 1 to 366 days"}), 400
+        
+        return jsonify(provider_summary(rollups_collection, ObjectId(provider_id), start, end)), 200
+        
+    except Exception as e:
+        app.logger.error(f"Error fetching provider analytics: {str(e)}")
+        return jsonify({"msg": "Failed to fetch analytics", "error": str(e)}), 500
+
 # Get booking details by ID
 @bookings_bp.route('/booking/<booking_id>', methods=['GET'])
 @jwt_required()
@@ -204,8 +723,10 @@ def get_booking(booking_id):
     try:
         user_id = get_jwt_identity()
         
-        # Find the booking
+        # Find the booking; archived bookings are only looked up on request
         booking = bookings_collection.find_one({"_id": ObjectId(booking_id)})
+        if not booking and wants_archive(request):
+            booking = archive_collection.find_one({"_id": ObjectId(booking_id)})
         
         if not booking:
             return jsonify({"msg": "Booking not found"}), 404
@@ -215,21 +736,103 @@ def get_booking(booking_id):
             return jsonify({"msg": "You don't have permission to view this booking"}), 403
         
         # Convert ObjectIds to strings
-        booking['_id'] = str(booking['_id'])
-        booking['service_id'] = str(booking['service_id'])
-        booking['consumer_id'] = str(booking['consumer_id'])
-        booking['provider_id'] = str(booking['provider_id'])
-        
-        # Convert datetime to string
-        if isinstance(booking.get('created_at'), datetime):
-            booking['created_at'] = booking['created_at'].isoformat()
-        
-        return jsonify(booking), 200
+        return jsonify(_serialize_booking(booking)), 200
         
     except Exception as e:
         app.logger.error(f"Error fetching booking: {str(e)}")
         return jsonify({"msg": "Failed to fetch booking", "error": str(e)}), 500
 
+# Provider availability: free and booked slots over a date range
+# Query params: provider_id or service_id (required), start (ISO date/datetime,
+# default now), days (default 7, max 31)
+@bookings_bp.route('/availability', methods=['GET'])
+@jwt_required()
+def get_availability():
+    try:
+        provider_id = request.args.get('provider_id')
+        service_id = request.args.get('service_id')
+        if provider_id and not ObjectId.is_valid(provider_id):
+            return jsonify({"msg": "Invalid provider id"}), 400
+        if service_id and not ObjectId.is_valid(service_id):
+            return jsonify({"msg": "Invalid service id"}), 400
+        if not provider_id and service_id:
+            service = _get_service(service_id)
+            if not service:
+                return jsonify({"msg": "Service not found"}), 404
+            provider_id = service.get("created_by")
+        if not provider_id:
+            return jsonify({"msg": "provider_id or service_id is required"}), 400
+
+        try:
+            start_arg = request.args.get('start')
+            start = to_naive_utc(datetime.fromisoformat(start_arg.replace('Z', '+00:00'))) if start_arg \
+                else to_naive_utc(datetime.now().astimezone())
+            days = max(1, min(int(request.args.get('days', 7)), 31))
+        except ValueError:
+            return jsonify({"msg": "Invalid start or days parameter"}), 400
+        end = start + timedelta(days=days)
+
+        slot_minutes, utc_offset = _slot_config()
+        booked = provider_calendar.booked_between(provider_id, start, end)
+        free = provider_calendar.free_slots(
+            provider_id, start, end, slot_minutes,
+            app.config.get("BOOKING_DAY_START_HOUR", 9),
+            app.config.get("BOOKING_DAY_END_HOUR", 18),
+            utc_offset
+        )
+
+        return jsonify({
+            "provider_id": str(provider_id),
+            "slot_minutes": slot_minutes,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "free": [slot.isoformat() for slot in free],
+            "booked": [slot.isoformat() for slot in booked]
+        }), 200
+
+    except Exception as e:
+        app.logger.error(f"Error fetching availability: {str(e)}")
+        return jsonify({"msg": "Failed to fetch availability", "error": str(e)}), 500
+
+# Providers can set any status, consumers can only cancel; returns the reason or None
+def _status_change_denied(booking, user_id, new_status):
+    is_provider = str(booking["provider_id"]) == user_id
+    is_consumer = str(booking["consumer_id"]) == user_id
+    
+    if not (is_provider or is_consumer):
+        return "You don't have permission to update this booking"
+    if is_consumer and new_status != "cancelled":
+        return "Consumers can only cancel bookings"
+    return None
+
+# Returned when a status write finds the booking changed since it was read
+STATUS_CHANGED_MSG = "The booking was changed by another request; reload it and try again"
+
+# Update document for a status change; a cancelled booking gives its slot
+# back and a reactivated one takes it again (DuplicateKeyError if it is taken)
+def _status_update(booking, new_status, now=None):
+    update = {"$set": {
+        "status": new_status,
+        "updated_at": now or datetime.now()
+    }}
+    if new_status == "cancelled":
+        update["$unset"] = {"slot_start": ""}
+    else:
+        slot = slot_for_status(booking, new_status, *_slot_config())
+        if slot is not None:
+            update["$set"]["slot_start"] = slot
+    return update
+
+# Keep the calendar view in step with a status change that was written
+def _update_calendar(booking, new_status):
+    if new_status == "cancelled":
+        if booking.get("slot_start"):
+            provider_calendar.remove(booking["provider_id"], booking["slot_start"])
+    elif not booking.get("slot_start"):
+        slot = slot_for_status(booking, new_status, *_slot_config())
+        if slot is not None:
+            provider_calendar.add(booking["provider_id"], slot)
+
 # Update booking status (e.g., confirm, complete, or cancel)
 @bookings_bp.route('/update-status/<booking_id>', methods=['PUT'])
 @jwt_required()
@@ -243,7 +846,7 @@ def update_booking_status(booking_id):
             return jsonify({"msg": "Missing status field"}), 400
             
         new_status = data['status']
-        if new_status not in ["pending", "confirmed", "completed", "cancelled"]:
+        if new_status not in BOOKING_STATUSES:
             return jsonify({"msg": "Invalid status value"}), 400
         
         # Find the booking
@@ -252,27 +855,30 @@ def update_booking_status(booking_id):
         if not booking:
             return jsonify({"msg": "Booking not found"}), 404
         
-        # Check permissions (providers can update any status, consumers can only cancel)
-        is_provider = str(booking["provider_id"]) == user_id
-        is_consumer = str(booking["consumer_id"]) == user_id
-        
-        if not (is_provider or is_consumer):
-            return jsonify({"msg": "You don't have permission to update this booking"}), 403
+        denied = _status_change_denied(booking, user_id, new_status)
+        if denied:
+            return jsonify({"msg": denied}), 403
         
-        if is_consumer and new_status != "cancelled":
-            return jsonify({"msg": "Consumers can only cancel bookings"}), 403
-        
-        # Update the booking status
-        result = bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": {
-                "status": new_status,
-                "updated_at": datetime.now()
-            }}
-        )
+        # Only write if the status is still what we read, so the rollup delta
+        # below is applied once even when another request or the auto-complete
+        # sweep changes the booking concurrently
+        try:
+            result = bookings_collection.update_one(
+                {"_id": ObjectId(booking_id), "status": booking.get("status")},
+                _status_update(booking, new_status)
+            )
+        except DuplicateKeyError:
+            # Reactivating a cancelled booking whose slot has been booked since
+            return jsonify({"msg": "The provider is already booked for this time slot"}), 409
         
+        if result.matched_count == 0:
+            return jsonify({"msg": STATUS_CHANGED_MSG}), 409
         if result.modified_count == 0:
             return jsonify({"msg": "No changes were made"}), 200
+
+        _update_calendar(booking, new_status)
+        if booking.get("status") != new_status:
+            _record_status_rollups([(booking, booking.get("status"), new_status)])
         
         return jsonify({"msg": "Booking status updated successfully"}), 200
         
@@ -280,6 +886,120 @@ def update_booking_status(booking_id):
         app.logger.error(f"Error updating booking status: {str(e)}")
         return jsonify({"msg": "Failed to update booking", "error": str(e)}), 500
 
+# Update the status of many bookings at once
+# Body: {"updates": [{"booking_id": ..., "status": ...}, ...]}
+#   or  {"booking_ids": [...], "status": ...} to give them all the same status
+@bookings_bp.route('/bulk-status', methods=['PUT'])
+@jwt_required()
+def bulk_update_booking_status():
+    try:
+        data = request.get_json() or {}
+        user_id = get_jwt_identity()
+        
+        if "updates" in data:
+            updates = data["updates"]
+        else:
+            updates = [{"booking_id": booking_id, "status": data.get("status")}
+                       for booking_id in data.get("booking_ids") or []]
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"msg": "updates must be a non-empty list"}), 400
+        if len(updates) > MAX_BATCH_BOOKINGS:
+            return jsonify({"msg": f"At most {MAX_BATCH_BOOKINGS} bookings per request"}), 400
+        
+        results = {}
+        wanted = {}
+        for item in updates:
+            booking_id = str(item.get("booking_id", "")) if isinstance(item, dict) else ""
+            if not ObjectId.is_valid(booking_id):
+                results[booking_id] = {"status": 400, "msg": "Invalid booking id"}
+            elif item.get("status") not in BOOKING_STATUSES:
+                results[booking_id] = {"status": 400, "msg": "Invalid status value"}
+            else:
+                wanted[booking_id] = item["status"]
+        
+        # One permission query: only bookings this user provides or booked come back
+        bookings = {
+            str(booking["_id"]): booking
+            for booking in bookings_collection.find(
+                {"_id": {"$in": [ObjectId(booking_id) for booking_id in wanted]},
+                 "$or": [{"provider_id": ObjectId(user_id)}, {"consumer_id": ObjectId(user_id)}]},
+                {"provider_id": 1, "consumer_id": 1, "status": 1, "slot_start": 1,
+                 "scheduled_at": 1, "booking_datetime": 1, "price": 1}
+            )
+        } if wanted else {}
+        
+        now = datetime.now()
+        ops = []
+        applied = []
+        for booking_id, new_status in wanted.items():
+            booking = bookings.get(booking_id)
+            if booking is None:
+                # The query only returns this user's bookings, so others read as not found
+                results[booking_id] = {"status": 404, "msg": "Booking not found"}
+                continue
+            denied = _status_change_denied(booking, user_id, new_status)
+            if denied:
+                results[booking_id] = {"status": 403, "msg": denied}
+                continue
+            if booking.get("status") == new_status:
+                results[booking_id] = {"status": 200, "msg": "No changes were made"}
+                continue
+            # Conditional on the status read above, as in update_booking_status
+            ops.append(UpdateOne({"_id": booking["_id"], "status": booking.get("status")},
+                                 _status_update(booking, new_status, now)))
+            applied.append((booking, new_status))
+        
+        failed = {}
+        matched_count = 0
+        if ops:
+            try:
+                matched_count = bookings_collection.bulk_write(ops, ordered=False).matched_count
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed[error["index"]] = error
+                matched_count = e.details.get("nMatched", 0)
+        
+        # When some writes matched nothing (the status changed since it was
+        # read), find the ones that did by the updated_at this request wrote
+        written = None
+        if matched_count < len(ops) - len(failed):
+            written = {
+                doc["_id"]: doc.get("status")
+                for doc in bookings_collection.find(
+                    {"_id": {"$in": [booking["_id"] for booking, _ in applied]}, "updated_at": now},
+                    {"status": 1}
+                )
+            }
+        
+        updated = 0
+        changes = []
+        for pos, (booking, new_status) in enumerate(applied):
+            if pos in failed:
+                if failed[pos].get("code") == 11000:
+                    results[str(booking["_id"])] = {"status": 409, "msg": "The provider is already booked for this time slot"}
+                else:
+                    results[str(booking["_id"])] = {"status": 500, "msg": failed[pos].get("errmsg", "Update failed")}
+                continue
+            if written is not None and written.get(booking["_id"]) != new_status:
+                results[str(booking["_id"])] = {"status": 409, "msg": STATUS_CHANGED_MSG}
+                continue
+            updated += 1
+            results[str(booking["_id"])] = {"status": 200, "msg": "Booking status updated successfully",
+                                            "booking_status": new_status}
+            _update_calendar(booking, new_status)
+            changes.append((booking, booking.get("status"), new_status))
+        if changes:
+            _record_status_rollups(changes)
+        
+        return jsonify({
+            "updated": updated,
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        app.logger.error(f"Error updating booking statuses: {str(e)}")
+        return jsonify({"msg": "Failed to update bookings", "error": str(e)}), 500
+
 # Add feedback/rating to a completed booking
 @bookings_bp.route('/feedback/<booking_id>', methods=['POST'])
 @jwt_required()
@@ -296,6 +1016,10 @@ def add_booking_feedback(booking_id):
         booking = bookings_collection.find_one({"_id": ObjectId(booking_id)})
         
         if not booking:
+            # Feedback closes once a booking has been archived
+            archived = archive_collection.find_one({"_id": ObjectId(booking_id)}, {"consumer_id": 1})
+            if archived and str(archived["consumer_id"]) == user_id:
+                return jsonify({"msg": "Feedback is closed for archived bookings"}), 400
             return jsonify({"msg": "Booking not found"}), 404
         
         # Only consumers can leave feedback
@@ -307,22 +1031,38 @@ def add_booking_feedback(booking_id):
             return jsonify({"msg": "Feedback can only be provided for completed bookings"}), 400
         
         # Update the booking with feedback
+        previous = booking.get('feedback') or {}
+        old_rating = previous.get('rating')
         feedback = {
             "rating": data['rating'],
             "comment": data.get('comment', ''),
-            "created_at": datetime.now()
+            "created_at": previous.get('created_at', datetime.now())
         }
+        if old_rating is not None:
+            feedback["updated_at"] = datetime.now()
         
+        # Only write if the feedback is still what we read, so the rating
+        # delta below is applied exactly once even with concurrent edits.
+        # updated_at tells the archive job the booking changed after it was copied
         result = bookings_collection.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": {"feedback": feedback}}
+            {"_id": ObjectId(booking_id), "feedback.rating": old_rating if old_rating is not None else {"$exists": False}},
+            {"$set": {"feedback": feedback, "updated_at": datetime.now()}}
         )
         
+        if result.matched_count == 0:
+            return jsonify({"msg": "Feedback was changed by another request, please retry"}), 409
         if result.modified_count == 0:
             return jsonify({"msg": "No changes were made"}), 200
         
-        # Optionally: Update the provider's average rating
-        update_provider_rating(str(booking["provider_id"]))
+        # Fold the change into the provider's running rating aggregates
+        # (scripts/reconcile_ratings.py rebuilds them if this ever fails)
+        if old_rating != data['rating']:
+            try:
+                apply_rating_change(users_collection, booking["provider_id"], old_rating, data['rating'])
+                profile_cache.invalidate(booking["provider_id"])
+            except Exception as e:
+                app.logger.error(f"Error updating provider rating: {str(e)}")
+            _record_rollups(lambda: [(booking, rating_change_inc(old_rating, data['rating']))])
         
         return jsonify({"msg": "Feedback added successfully"}), 200
         
@@ -330,91 +1070,21 @@ def add_booking_feedback(booking_id):
         app.logger.error(f"Error adding feedback: {str(e)}")
         return jsonify({"msg": "Failed to add feedback", "error": str(e)}), 500
 
-# Helper function to update provider's average rating
-def update_provider_rating(provider_id):
-    try:
-        # Find all completed bookings with feedback for this provider
-        pipeline = [
-            {"$match": {
-                "provider_id": ObjectId(provider_id),
-                "status": "completed",
-                "feedback": {"$exists": True}
-            }},
-            {"$group": {
-                "_id": "$provider_id",
-                "average_rating": {"$avg": "$feedback.rating"},
-                "rating_count": {"$sum": 1}
-            }}
-        ]
-        
-        result = list(bookings_collection.aggregate(pipeline))
-        
-        if result:
-            rating_data = result[0]
-            # Update the provider's profile with the new rating data
-            users_collection.update_one(
-                {"_id": ObjectId(provider_id)},
-                {"$set": {
-                    "providerDetails.average_rating": round(rating_data["average_rating"], 1),
-                    "providerDetails.rating_count": rating_data["rating_count"]
-                }}
-            )
-    except Exception as e:
-        app.logger.error(f"Error updating provider rating: {str(e)}")
-
 @bookings_bp.route('/auto-complete', methods=['PUT'])
 @jwt_required()
 def auto_complete_bookings():
     try:
-        from dateutil.parser import parse as parse_date
-        
-        # Calculate cutoff time (2 hours ago)
-        cutoff_time = datetime.now() - timedelta(hours=2)
-        
-        # Get all pending/confirmed bookings
-        pending_bookings = list(bookings_collection.find({
-            'status': {'$in': ['pending', 'confirmed']}
-        }))
-        
-        updated_count = 0
-        
-        # Check each booking individually
-        for booking in pending_bookings:
-            try:
-                booking_time = None
-                
-                # Try different field names
-                if 'booking_datetime' in booking:
-                    booking_time = booking['booking_datetime']
-                elif 'booking_date' in booking:
-                    booking_time = booking['booking_date']
-                elif 'date' in booking:
-                    booking_time = booking['date']
-                
-                if booking_time:
-                    # If it's a string, parse it
-                    if isinstance(booking_time, str):
-                        booking_time = parse_date(booking_time)
-                    
-                    # Check if booking is older than cutoff
-                    if booking_time < cutoff_time:
-                        result = bookings_collection.update_one(
-                            {'_id': booking['_id']},
-                            {'$set': {'status': 'completed'}}
-                        )
-                        if result.modified_count > 0:
-                            updated_count += 1
-                            
-            except Exception as booking_error:
-                app.logger.error(f"Error processing booking {booking.get('_id')}: {str(booking_error)}")
-                continue
-        
-        app.logger.info(f"Manual auto-complete: Updated {updated_count} bookings")
+        stats = run_auto_complete(
+            bookings_collection,
+            grace_hours=app.config.get("AUTO_COMPLETE_GRACE_HOURS", 2),
+            chunk_size=app.config.get("AUTO_COMPLETE_CHUNK_SIZE", 5000),
+            logger=app.logger,
+            rollups_collection=rollups_collection
+        )
         
         return jsonify({
-            'message': f'Auto-completed {updated_count} bookings',
-            'updated': updated_count,
-            'total_pending': len(pending_bookings)
+            'message': f'Auto-completed {stats["updated"]} bookings',
+            **stats
         }), 200
         
     except Exception as e:
@@ -422,4 +1092,4 @@ def auto_complete_bookings():
         return jsonify({
             'message': 'Failed to auto-complete bookings',
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
@@ -1,13 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
+import re
 import traceback
 from pymongo.errors import PyMongoError
 from flask_cors import CORS
 
 # Import app and db
-from extensions import mongo
+from extensions import mongo, limiter
+from utils.rate_limit import configured_limit
 from flask import current_app as app
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.suggest_index import suggest_index
+from utils.geo_index import nearby_index
+from utils.cache import service_cache
+from utils.singleflight import catalog_flight, coalesce_get
+from utils.streaming import stream_json_array, stream_ndjson, wants_ndjson, NDJSON_MIMETYPE
 
 # Initialize services blueprint
 services_bp = Blueprint('services', __name__)
@@ -27,54 +35,295 @@ services_collection = mongo.db.services
 #         app.logger.error(f"Error creating geospatial index: {str(e)}")
 
 
+# Convert ObjectId to string for JSON serialization
+def _serialize_service(service):
+    service['_id'] = str(service['_id'])
+    return service
+
 # Get all services
+# Modes:
+#   (default)            full catalog as a JSON array, streamed from the cursor
+#   ?format=ndjson       full catalog as newline-delimited JSON, streamed
+#   ?limit=N&cursor=...  one _id-keyset page: {"services": [...], "next_cursor": ...}
 @services_bp.route('/all', methods=['GET'])
+@limiter.limit(configured_limit("RATE_LIMIT_CATALOG", "120 per minute"))
+@coalesce_get(catalog_flight, when=lambda: 'limit' in request.args or 'cursor' in request.args)
 def get_all_services():
     try:
-        services = list(services_collection.find())
-        # Convert ObjectId to string for JSON serialization
-        for service in services:
-            service['_id'] = str(service['_id'])
-        return jsonify(services), 200
+        batch_size = app.config.get("CATALOG_BATCH_SIZE", 200)
+
+        if 'limit' in request.args or 'cursor' in request.args:
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                query = {}
+                token = request.args.get('cursor')
+                if token:
+                    (last_id,) = decode_cursor(token, (ObjectId,))
+                    query["_id"] = {"$gt": last_id}
+            except ValueError as e:
+                return jsonify({"msg": "Invalid pagination parameters", "error": str(e)}), 400
+
+            # Fetch one extra document to know whether another page exists
+            cursor = services_collection.find(query).sort("_id", 1).limit(limit + 1)
+            services = list(cursor)
+            next_cursor = None
+            if len(services) > limit:
+                services = services[:limit]
+                next_cursor = encode_cursor(services[-1]['_id'])
+
+            return jsonify({
+                "services": [_serialize_service(s) for s in services],
+                "next_cursor": next_cursor
+            }), 200
+
+        cursor = services_collection.find().sort("_id", 1).batch_size(batch_size)
+        if wants_ndjson(request):
+            body = stream_ndjson(cursor, _serialize_service)
+            mimetype = NDJSON_MIMETYPE
+        else:
+            body = stream_json_array(cursor, _serialize_service)
+            mimetype = "application/json"
+        return Response(stream_with_context(body), mimetype=mimetype), 200
     except Exception as e:
         app.logger.error(f"Error fetching all services: {str(e)}")
         app.logger.error(traceback.format_exc())
         return jsonify({"msg": "Failed to fetch services", "error": str(e)}), 500
 
+# Load a single service ready for JSON (used as the cache loader)
+def _load_service(service_id):
+    service = services_collection.find_one({"_id": ObjectId(service_id)})
+    return _serialize_service(service) if service else None
+
 # Get service by ID
 @services_bp.route('/service/<service_id>', methods=['GET'])
 def get_service_by_id(service_id):
     try:
-        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        service = service_cache.get_service(service_id, lambda: _load_service(service_id))
         if not service:
             return jsonify({"msg": "Service not found"}), 404
         
-        # Convert ObjectId to string
-        service['_id'] = str(service['_id'])
         return jsonify(service), 200
     except Exception as e:
         app.logger.error(f"Error fetching service by ID: {str(e)}")
         return jsonify({"msg": "Failed to fetch service", "error": str(e)}), 500
 
-# Search services by title
+# Full-text search helpers
+MAX_SEARCH_TERMS = 8
+MAX_SEARCH_TERM_LENGTH = 40
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _tokenize_query(text):
+    """
+    Split user input into plain word tokens. Dropping everything else means
+    $text operators (quotes, negation) and regex metacharacters never reach
+    the database.
+    """
+    tokens = [t[:MAX_SEARCH_TERM_LENGTH] for t in TOKEN_RE.findall(text or "")]
+    return tokens[:MAX_SEARCH_TERMS]
+
+def _text_search(tokens, limit, skip=0):
+    """
+    Run a ranked $text search over title, description and provider_name.
+    Every page comes from the text index alone; partial words typed by the
+    user are served by /suggest, which never scans the collection.
+    """
+    return list(
+        services_collection.find(
+            {"$text": {"$search": " ".join(tokens)}},
+            {"score": {"$meta": "textScore"}}
+        )
+        .sort([("score", {"$meta": "textScore"})])
+        .skip(skip)
+        .limit(limit)
+    )
+
+# Search services by title and description, ranked by relevance
+# Query params: q (required), limit (default 20, max 100), page (default 1)
+@services_bp.route('/search', methods=['GET'])
+def search_services():
+    try:
+        tokens = _tokenize_query(request.args.get('q'))
+        if not tokens:
+            return jsonify({"msg": "Search query is required"}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            page = max(1, int(request.args.get('page', 1)))
+        except ValueError:
+            return jsonify({"msg": "Invalid pagination parameters"}), 400
+
+        # Fetch one extra result to know whether another page exists
+        services = _text_search(tokens, limit + 1, skip=(page - 1) * limit)
+        has_more = len(services) > limit
+
+        return jsonify({
+            "services": [_serialize_service(s) for s in services[:limit]],
+            "page": page,
+            "limit": limit,
+            "has_more": has_more
+        }), 200
+    except Exception as e:
+        app.logger.error(f"Error searching services: {str(e)}")
+        return jsonify({"msg": "Failed to search services", "error": str(e)}), 500
+
+# Search services by title (kept for existing clients; returns a plain array)
 @services_bp.route('/service/title/<title>', methods=['GET'])
 def search_service_by_title(title):
     try:
-        services = list(services_collection.find({
-            "title": {"$regex": title, "$options": "i"}  # Case-insensitive search
-        }))
-        
-        # Convert ObjectId to string
-        for service in services:
-            service['_id'] = str(service['_id'])
-            
+        tokens = _tokenize_query(title)
+        if not tokens:
+            return jsonify([]), 200
+
+        def _load():
+            services = _text_search(tokens, app.config.get("TITLE_SEARCH_LIMIT", 50))
+            # Convert ObjectId to string and drop the internal relevance score
+            for service in services:
+                service.pop('score', None)
+                _serialize_service(service)
+            return services
+
+        services = service_cache.get_query("title", {"tokens": tokens}, _load)
         return jsonify(services), 200
     except Exception as e:
         app.logger.error(f"Error searching services by title: {str(e)}")
         return jsonify({"msg": "Failed to search services", "error": str(e)}), 500
 
+# Type-ahead suggestions served from the in-process prefix index
+# Query params: q (required), limit (default 8, max 20)
+@services_bp.route('/suggest', methods=['GET'])
+def suggest_services():
+    try:
+        query = request.args.get('q', '')
+        try:
+            limit = parse_limit(request.args.get('limit'), default=8, maximum=20)
+        except ValueError:
+            return jsonify({"msg": "Invalid limit"}), 400
+
+        # Pick up services written by other workers without blocking this request
+        suggest_index.maybe_refresh(services_collection, app.logger)
+
+        return jsonify({"query": query, "suggestions": suggest_index.suggest(query, limit)}), 200
+    except Exception as e:
+        app.logger.error(f"Error fetching suggestions: {str(e)}")
+        return jsonify({"msg": "Failed to fetch suggestions", "error": str(e)}), 500
+
+# Query params that switch /nearby into the $geoNear mode
+GEO_NEAR_PARAMS = ("limit", "cursor", "min_price", "max_price", "q", "category")
+
+def _parse_geo_filters(args):
+    """Parse price, title and category filters shared by the $geoNear and index paths."""
+    filters = {}
+    if args.get('min_price') not in (None, ""):
+        filters["min_price"] = float(args['min_price'])
+    if args.get('max_price') not in (None, ""):
+        filters["max_price"] = float(args['max_price'])
+    tokens = _tokenize_query(args.get('q'))
+    if tokens:
+        filters["title"] = " ".join(tokens)
+    if args.get('category'):
+        filters["category"] = args['category']
+    return filters
+
+def _geo_near_filter(filters):
+    """Build the $geoNear `query` document from parsed filters."""
+    query = {}
+    price = {}
+    if "min_price" in filters:
+        price["$gte"] = filters["min_price"]
+    if "max_price" in filters:
+        price["$lte"] = filters["max_price"]
+    if price:
+        query["price"] = price
+    if "title" in filters:
+        # $text cannot be combined with $geoNear, so filter titles with an escaped regex
+        query["title"] = {"$regex": re.escape(filters["title"]), "$options": "i"}
+    if "category" in filters:
+        query["category"] = filters["category"]
+    return query
+
+def _as_float(value):
+    # Prices may be stored as Decimal128 by older clients
+    if hasattr(value, "to_decimal"):
+        value = value.to_decimal()
+    return float(value)
+
+def _matches_geo_filters(service, filters):
+    """In-memory equivalent of _geo_near_filter, used by the nearby index path."""
+    if "min_price" in filters or "max_price" in filters:
+        try:
+            price = _as_float(service.get("price"))
+        except (TypeError, ValueError):
+            return False
+        if price < filters.get("min_price", price) or price > filters.get("max_price", price):
+            return False
+    if "title" in filters and filters["title"].lower() not in str(service.get("title", "")).lower():
+        return False
+    if "category" in filters and service.get("category") != filters["category"]:
+        return False
+    return True
+
+# The nearby index is only read (and so only kept up to date) when enabled and built
+def _use_nearby_index():
+    return app.config.get("NEARBY_INDEX_ENABLED", False) and nearby_index.ready
+
+def _index_page(lng, lat, radius_meters, filters, limit, cursor=None):
+    """Serve a $geoNear-shaped page from the in-process nearby index."""
+    services = []
+    next_cursor = None
+    for distance, service in nearby_index.query(lng, lat, radius_meters):
+        if cursor and (distance, service['_id']) <= (cursor[0], str(cursor[1])):
+            continue
+        if not _matches_geo_filters(service, filters):
+            continue
+        if len(services) == limit:
+            last = services[-1]
+            next_cursor = encode_cursor(last['_distance'], ObjectId(last['_id']))
+            break
+        services.append(dict(service, _distance=distance))
+    for service in services:
+        service['distance_m'] = round(service.pop('_distance'), 1)
+    return services, next_cursor
+
+def _geo_near_page(lng, lat, radius_meters, query, limit, cursor=None):
+    """
+    Return one distance-ordered page of services as (services, next_cursor).
+    The cursor is the (distance, _id) of the last result; the next page starts
+    at that distance via minDistance and skips ties already returned.
+    """
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_m",
+        "maxDistance": radius_meters,
+        "spherical": True,
+        "query": query
+    }
+    pipeline = [{"$geoNear": geo_near}]
+    if cursor:
+        last_distance, last_id = cursor
+        geo_near["minDistance"] = last_distance
+        pipeline.append({"$match": {"$or": [
+            {"distance_m": {"$gt": last_distance}},
+            {"distance_m": last_distance, "_id": {"$gt": last_id}}
+        ]}})
+    # Fetch one extra document to know whether another page exists
+    pipeline.append({"$limit": limit + 1})
+
+    services = list(services_collection.aggregate(pipeline))
+    next_cursor = None
+    if len(services) > limit:
+        services = services[:limit]
+        next_cursor = encode_cursor(services[-1]['distance_m'], services[-1]['_id'])
+    for service in services:
+        _serialize_service(service)
+        service['distance_m'] = round(service['distance_m'], 1)
+    return services, next_cursor
+
 # Get nearby services
+# Without paging/filter params this returns every service in the radius as an
+# array (legacy $near path). With any of GEO_NEAR_PARAMS it runs a $geoNear
+# aggregation and returns {"services": [... with distance_m], "next_cursor": ...}.
+# When NEARBY_INDEX_ENABLED is set both shapes are answered from nearby_index.
 @services_bp.route('/nearby', methods=['GET'])
+@coalesce_get(catalog_flight)
 def get_nearby_services():
     try:
         # Get query parameters
@@ -91,24 +340,54 @@ def get_nearby_services():
         
         # Convert radius from km to meters
         radius_meters = radius * 1000
-        
-        # Perform geospatial query
-        services = list(services_collection.find({
-            "location": {
-                "$near": {
-                    "$geometry": {
-                        "type": "Point",
-                        "coordinates": [lng, lat]
-                    },
-                    "$maxDistance": radius_meters
+
+        # Serve from the in-process index when enabled (NEARBY_INDEX_ENABLED)
+        use_index = _use_nearby_index()
+        if use_index:
+            nearby_index.maybe_refresh(services_collection, app.logger)
+
+        if any(param in request.args for param in GEO_NEAR_PARAMS):
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                filters = _parse_geo_filters(request.args)
+                token = request.args.get('cursor')
+                cursor = decode_cursor(token, ((int, float), ObjectId)) if token else None
+            except ValueError as e:
+                return jsonify({"msg": "Invalid query parameters", "error": str(e)}), 400
+
+            if use_index:
+                services, next_cursor = _index_page(lng, lat, radius_meters, filters, limit, cursor)
+                return jsonify({"services": services, "next_cursor": next_cursor}), 200
+
+            def _load_page():
+                services, next_cursor = _geo_near_page(
+                    lng, lat, radius_meters, _geo_near_filter(filters), limit, cursor
+                )
+                return {"services": services, "next_cursor": next_cursor}
+
+            cache_params = dict(filters, lat=lat, lng=lng, radius=radius_meters, limit=limit, cursor=token)
+            return jsonify(service_cache.get_query("nearby-page", cache_params, _load_page)), 200
+
+        if use_index:
+            return jsonify([service for _, service in nearby_index.query(lng, lat, radius_meters)]), 200
+
+        def _load():
+            # Perform geospatial query
+            services = list(services_collection.find({
+                "location": {
+                    "$near": {
+                        "$geometry": {
+                            "type": "Point",
+                            "coordinates": [lng, lat]
+                        },
+                        "$maxDistance": radius_meters
+                    }
                 }
-            }
-        }))
-        
-        # Convert ObjectId to string
-        for service in services:
-            service['_id'] = str(service['_id'])
-            
+            }))
+            # Convert ObjectId to string
+            return [_serialize_service(service) for service in services]
+
+        services = service_cache.get_query("nearby", {"lat": lat, "lng": lng, "radius": radius_meters}, _load)
         return jsonify(services), 200
     except PyMongoError as e:
         app.logger.error(f"Database error in nearby services: {str(e)}")
@@ -135,6 +414,10 @@ def create_service():
         
         # Insert the new service
         result = services_collection.insert_one(data)
+        suggest_index.add(result.inserted_id, data)
+        if _use_nearby_index():
+            nearby_index.add(result.inserted_id, data)
+        service_cache.invalidate_service(result.inserted_id)
         
         # Return the ID of the newly created service
         return jsonify({
@@ -171,6 +454,12 @@ def update_service(service_id):
         
         if result.modified_count == 0:
             return jsonify({"msg": "No changes made to the service"}), 200
+
+        service.update(data)
+        suggest_index.add(service_id, service)
+        if _use_nearby_index():
+            nearby_index.add(service_id, service)
+        service_cache.invalidate_service(service_id)
             
         return jsonify({"msg": "Service updated successfully"}), 200
     except Exception as e:
@@ -198,9 +487,25 @@ def delete_service(service_id):
         
         if result.deleted_count == 0:
             return jsonify({"msg": "Service could not be deleted"}), 500
+
+        suggest_index.remove(service_id)
+        if _use_nearby_index():
+            nearby_index.remove(service_id)
+        service_cache.invalidate_service(service_id)
             
         return jsonify({"msg": "Service deleted successfully"}), 200
     except Exception as e:
         app.logger.error(f"Error deleting service: {str(e)}")
         return jsonify({"msg": "Failed to delete service", "error": str(e)}), 500
 
+# Service cache hit/miss counters
+@services_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_service_cache_stats():
+    return jsonify(service_cache.stats()), 200
+
+# Request coalescing counters for /all and /nearby
+@services_bp.route('/coalescing/stats', methods=['GET'])
+@jwt_required()
+def get_coalescing_stats():
+    return jsonify(catalog_flight.stats()), 200
@@ -0,0 +1,34 @@
+"""
+Rebuild the provider analytics rollups (provider_daily_stats) from every
+booking, hot and archived. Run it once after deploying the rollups, and any
+time they drift (e.g. after a failed incremental update). Best run when
+booking traffic is low, since live writes during the rebuild can be
+overwritten by the recomputed totals.
+
+Usage (from backend_py/):
+    python scripts/backfill_analytics.py [--batch-size 1000]
+"""
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import argparse
+import os
+import sys
+
+# Allow "python scripts/backfill_analytics.py" from the backend_py directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.analytics import rebuild_rollups
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Rebuild provider analytics rollups from bookings")
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    # Connect to MongoDB
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client.get_default_database()
+
+    result = rebuild_rollups(db, args.batch_size)
+    print(f"Done: {result}")
@@ -0,0 +1,54 @@
+"""
+Compare per-value encrypt/decrypt with the batch API in utils/encryption.
+
+Usage (from backend_py/):
+    python scripts/bench_encryption.py [--count 10000] [--repeat 3]
+
+Uses ENCRYPTION_KEY from .env when set, otherwise a random key.
+"""
+from dotenv import load_dotenv
+import argparse
+import os
+import sys
+import time
+
+# Allow "python scripts/bench_encryption.py" from the backend_py directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+os.environ.setdefault("ENCRYPTION_KEY", os.urandom(32).hex())
+from utils.encryption import encrypt, decrypt, encrypt_many, decrypt_many
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark per-value vs batch encryption")
+    arg_parser.add_argument("--count", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    emails = [f"customer.{i}@example-{i % 97}.com" for i in range(args.count)]
+
+    single_enc, single = best_of(args.repeat, lambda: [encrypt(e) for e in emails])
+    batch_enc, binary = best_of(args.repeat, lambda: encrypt_many(emails))
+    single_dec, _ = best_of(args.repeat, lambda: [decrypt(v) for v in single])
+    batch_dec, decoded = best_of(args.repeat, lambda: decrypt_many(binary))
+    assert decoded == emails
+
+    def report(name, single, batch):
+        print(f"{name:8} per-value {args.count / single:>10.0f}/s   batch {args.count / batch:>10.0f}/s   "
+              f"x{single / batch:.2f}")
+
+    print(f"{args.count} values, best of {args.repeat}")
+    report("encrypt", single_enc, batch_enc)
+    report("decrypt", single_dec, batch_dec)
+    print(f"stored size: binary {sum(len(v) for v in binary)} bytes")
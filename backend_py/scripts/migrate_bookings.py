@@ -0,0 +1,143 @@
+"""
+Normalise legacy bookings onto the fields in models/booking.booking_schema:
+
+- scheduled_at: one datetime, taken from booking_datetime, booking_date
+  (+ booking_time), date or datetime, whichever the row has
+- status: lowercase (old rows were written as "Pending")
+
+Bookings are walked in _id order in batches and written with one unordered
+bulk_write per batch. Progress is checkpointed in the `migrations`
+collection, so the script can be stopped and rerun at any time, and it
+sleeps between batches to limit load on a live database.
+
+Usage (from backend_py/):
+    python scripts/migrate_bookings.py [--batch-size 1000] [--sleep 0.2] [--dry-run] [--restart]
+"""
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+from dateutil import parser as date_parser
+import argparse
+import os
+import time
+
+MIGRATION_ID = "bookings_scheduled_at_v1"
+LEGACY_DATE_FIELDS = ("booking_datetime", "booking_date", "date", "datetime")
+
+
+def _to_naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def resolve_scheduled_at(booking):
+    """Return the booking's scheduled datetime from whichever legacy field it has, or None."""
+    for field in LEGACY_DATE_FIELDS:
+        value = booking.get(field)
+        if not value:
+            continue
+        if isinstance(value, datetime):
+            return _to_naive_utc(value)
+        if isinstance(value, str):
+            text = value
+            # create_booking stored the date and time separately as strings
+            if field == "booking_date" and booking.get("booking_time"):
+                text = f"{value} {booking['booking_time']}"
+            try:
+                return _to_naive_utc(date_parser.parse(text))
+            except (ValueError, OverflowError):
+                continue
+    return None
+
+
+def build_update(booking):
+    """Return the $set document needed to normalise one booking, or None if it is already canonical."""
+    changes = {}
+    if not isinstance(booking.get("scheduled_at"), datetime):
+        scheduled_at = resolve_scheduled_at(booking)
+        if scheduled_at is not None:
+            changes["scheduled_at"] = scheduled_at
+    status = booking.get("status")
+    if isinstance(status, str) and status != status.lower():
+        changes["status"] = status.lower()
+    return changes or None
+
+
+def migrate(db, batch_size=1000, sleep_seconds=0.2, dry_run=False, restart=False):
+    bookings = db.bookings
+    checkpoints = db.migrations
+    if restart:
+        checkpoints.delete_one({"_id": MIGRATION_ID})
+    checkpoint = checkpoints.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = checkpoint.get("last_id")
+    processed = checkpoint.get("processed", 0)
+    updated = checkpoint.get("updated", 0)
+    unresolved = checkpoint.get("unresolved", 0)
+
+    projection = {field: 1 for field in LEGACY_DATE_FIELDS + ("booking_time", "scheduled_at", "status")}
+    started = time.monotonic()
+    batch_processed = 0
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(bookings.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        ops = []
+        for booking in batch:
+            changes = build_update(booking)
+            if changes:
+                ops.append(UpdateOne({"_id": booking["_id"]}, {"$set": changes}))
+            # No usable date anywhere; these need manual attention
+            if not isinstance(booking.get("scheduled_at"), datetime) and not (changes and "scheduled_at" in changes):
+                unresolved += 1
+
+        if ops and not dry_run:
+            updated += bookings.bulk_write(ops, ordered=False).modified_count
+        elif dry_run:
+            updated += len(ops)
+
+        last_id = batch[-1]["_id"]
+        processed += len(batch)
+        batch_processed += len(batch)
+        if not dry_run:
+            checkpoints.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {"last_id": last_id, "processed": processed, "updated": updated,
+                          "unresolved": unresolved, "updated_at": datetime.now()}},
+                upsert=True
+            )
+
+        elapsed = time.monotonic() - started
+        rate = batch_processed / elapsed if elapsed > 0 else 0
+        print(f"processed={processed} updated={updated} unresolved={unresolved} ({rate:.0f} docs/s)")
+
+        if len(batch) < batch_size:
+            break
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+    if not dry_run:
+        checkpoints.update_one({"_id": MIGRATION_ID}, {"$set": {"completed_at": datetime.now()}}, upsert=True)
+    return {"processed": processed, "updated": updated, "unresolved": unresolved}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Normalise booking scheduled_at/status fields")
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    arg_parser.add_argument("--sleep", type=float, default=0.2, help="seconds to pause between batches")
+    arg_parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    arg_parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = arg_parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    # Connect to MongoDB
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client.get_default_database()
+
+    result = migrate(db, args.batch_size, args.sleep, args.dry_run, args.restart)
+    print(f"Done: {result}")
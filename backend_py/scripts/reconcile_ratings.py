@@ -0,0 +1,20 @@
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import os
+import sys
+
+# Allow "python scripts/reconcile_ratings.py" from the backend_py directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ratings import rebuild_provider_ratings
+
+# Load environment variables
+load_dotenv()
+
+# Connect to MongoDB
+client = MongoClient(os.getenv("MONGO_URI"))
+db = client.get_default_database()
+
+# Rebuild providerDetails.rating_sum / rating_count / rating_histogram / average_rating
+# from the feedback stored on bookings (hot and archived)
+updated = rebuild_provider_ratings(db.bookings, db.users, archive_collection=db.bookings_archive)
+print(f"Reconciled rating aggregates for {updated} providers")
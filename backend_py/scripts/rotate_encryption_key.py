@@ -0,0 +1,94 @@
+"""
+Re-encrypt stored PII under the current ENCRYPTION_KEY, in the compact
+binary format from utils/encryption.encrypt_many.
+
+To rotate: set ENCRYPTION_KEY to the new key, list the old key(s) in
+ENCRYPTION_PREVIOUS_KEYS (and set ENCRYPTION_LEGACY_KEY to the old key if
+legacy hex strings exist), deploy, then run this script. Documents are
+walked in _id order in batches; each batch is decrypted and re-encrypted
+with one batch call per field and written with one unordered bulk_write.
+Every write is conditional on the value not having changed since it was
+read, and values already under the current key are skipped, so the script
+can be stopped and rerun at any time. Once it reports nothing left to
+rotate, the old keys can be removed.
+
+Usage (from backend_py/):
+    python scripts/rotate_encryption_key.py [--batch-size 1000] [--sleep 0.1] [--dry-run]
+"""
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+import argparse
+import os
+import sys
+import time
+
+# Allow "python scripts/rotate_encryption_key.py" from the backend_py directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load environment variables before utils.encryption reads the keys
+load_dotenv()
+from utils.encryption import encrypt_many, decrypt_many, is_current
+
+# Encrypted fields per collection
+ENCRYPTED_FIELDS = {
+    "users": ["email"],
+}
+
+
+def rotate_collection(collection, fields, batch_size=1000, sleep_seconds=0.1, dry_run=False):
+    projection = {field: 1 for field in fields}
+    last_id = None
+    scanned = 0
+    rotated = 0
+    started = time.monotonic()
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(collection.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        updates = {}   # _id -> ({field: old}, {field: new})
+        for field in fields:
+            stale = [doc for doc in batch if doc.get(field) and not is_current(doc[field])]
+            if not stale:
+                continue
+            fresh = encrypt_many(decrypt_many([doc[field] for doc in stale]))
+            for doc, value in zip(stale, fresh):
+                old, new = updates.setdefault(doc["_id"], ({}, {}))
+                old[field] = doc[field]
+                new[field] = value
+
+        if updates and not dry_run:
+            ops = [UpdateOne({"_id": _id, **old}, {"$set": new}) for _id, (old, new) in updates.items()]
+            rotated += collection.bulk_write(ops, ordered=False).modified_count
+        else:
+            rotated += len(updates)
+
+        last_id = batch[-1]["_id"]
+        scanned += len(batch)
+        elapsed = time.monotonic() - started
+        print(f"{collection.name}: scanned={scanned} rotated={rotated} ({scanned / elapsed if elapsed else 0:.0f} docs/s)")
+
+        if len(batch) < batch_size:
+            break
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+    return {"scanned": scanned, "rotated": rotated}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Re-encrypt PII under the current ENCRYPTION_KEY")
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    arg_parser.add_argument("--sleep", type=float, default=0.1, help="seconds to pause between batches")
+    arg_parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = arg_parser.parse_args()
+
+    # Connect to MongoDB
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client.get_default_database()
+
+    for name, fields in ENCRYPTED_FIELDS.items():
+        result = rotate_collection(db[name], fields, args.batch_size, args.sleep, args.dry_run)
+        print(f"Done {name}: {result}")
@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from utils.analytics import price_value, status_change_inc, rating_change_inc, apply_rollup_incs
+
+
+def _booking(price):
+    return {"provider_id": ObjectId(), "scheduled_at": datetime(2026, 3, 4, 10), "price": price}
+
+
+def test_price_value_coerces_stored_prices():
+    assert price_value(40) == 40
+    assert price_value(12.5) == 12.5
+    assert price_value(Decimal128("19.99")) == 19.99
+    assert price_value(Decimal128(Decimal("7"))) == 7.0
+    assert price_value("25.50") == 25.5
+    assert price_value(" 30 ") == 30.0
+
+
+def test_price_value_treats_non_numbers_as_zero():
+    for value in (None, "", "free", "NaN", float("inf"), True, {"amount": 5}, [5]):
+        assert price_value(value) == 0
+
+
+def test_completing_a_booking_adds_its_price():
+    for price, expected in ((Decimal128("19.99"), 19.99), ("25.50", 25.5), (None, 0)):
+        inc = status_change_inc(_booking(price), "confirmed", "completed")
+        assert inc == {"counts.confirmed": -1, "counts.completed": 1, "revenue": expected}
+
+
+def test_leaving_completed_takes_its_price_back():
+    inc = status_change_inc(_booking(Decimal128("19.99")), "Completed", "cancelled")
+    assert inc == {"counts.completed": -1, "counts.cancelled": 1, "revenue": -19.99}
+
+
+def test_new_booking_counts_without_revenue():
+    assert status_change_inc(_booking("25.50"), None, "pending") == {"bookings": 1, "counts.pending": 1}
+
+
+def test_rating_change_inc():
+    assert rating_change_inc(None, 4) == {"rating_sum": 4, "rating_count": 1}
+    assert rating_change_inc(4, 2) == {"rating_sum": -2}
+
+
+def test_apply_rollup_incs_merges_changes_per_bucket(db):
+    rollups = db.provider_daily_stats
+    booking = _booking(Decimal128("10"))
+    undated = {"provider_id": ObjectId(), "price": 10}
+    touched = apply_rollup_incs(rollups, [
+        (booking, status_change_inc(booking, None, "pending")),
+        (booking, status_change_inc(booking, "pending", "completed")),
+        (undated, status_change_inc(undated, None, "pending"))
+    ])
+
+    assert touched == 1
+    bucket = rollups.find_one({"_id": f"{booking['provider_id']}:2026-03-04"})
+    assert bucket["bookings"] == 1
+    assert bucket["counts"] == {"pending": 0, "completed": 1}
+    assert bucket["revenue"] == 10.0
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from utils.archive import archive_bookings
+
+
+def _booking(db, days_ago, status="completed", **extra):
+    return db.bookings.insert_one({
+        "provider_id": ObjectId(), "consumer_id": ObjectId(), "status": status,
+        "scheduled_at": datetime.now() - timedelta(days=days_ago), **extra
+    }).inserted_id
+
+
+def test_moves_old_terminal_bookings_only(db):
+    old = _booking(db, 100)
+    old_cancelled = _booking(db, 100, status="cancelled", updated_at=datetime(2026, 1, 1))
+    recent = _booking(db, 10)
+    open_booking = _booking(db, 100, status="pending")
+
+    stats = archive_bookings(db.bookings, db.bookings_archive, older_than_days=90)
+
+    assert stats["moved"] == 2
+    assert {d["_id"] for d in db.bookings_archive.find()} == {old, old_cancelled}
+    assert {d["_id"] for d in db.bookings.find()} == {recent, open_booking}
+
+
+def test_booking_written_after_the_copy_stays_hot(db):
+    booking_id = _booking(db, 100)
+
+    class Archive:
+        """Archive collection that lets feedback land right after the copy."""
+
+        def __init__(self, collection):
+            self.collection = collection
+
+        def bulk_write(self, ops, ordered=True):
+            result = self.collection.bulk_write(ops, ordered=ordered)
+            db.bookings.update_one({"_id": booking_id},
+                                   {"$set": {"feedback": {"rating": 5}, "updated_at": datetime.now()}})
+            return result
+
+    stats = archive_bookings(db.bookings, Archive(db.bookings_archive), older_than_days=90)
+    assert stats["moved"] == 0
+    assert db.bookings.find_one({"_id": booking_id})["feedback"] == {"rating": 5}
+
+    # The next run archives the newer copy, feedback included
+    assert archive_bookings(db.bookings, db.bookings_archive, older_than_days=90)["moved"] == 1
+    assert db.bookings_archive.find_one({"_id": booking_id})["feedback"] == {"rating": 5}
+
+
+def test_feedback_is_closed_for_archived_bookings(client, auth, db):
+    consumer_id = ObjectId()
+    booking_id = _booking(db, 100, consumer_id=consumer_id)
+    archive_bookings(db.bookings, db.bookings_archive, older_than_days=90)
+
+    response = client.post(f"/api/bookings/feedback/{booking_id}", headers=auth(consumer_id), json={"rating": 4})
+    assert response.status_code == 400
+    assert "archived" in response.get_json()["msg"]
+    assert client.post(f"/api/bookings/feedback/{booking_id}", headers=auth(ObjectId()),
+                       json={"rating": 4}).status_code == 404
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from utils.auto_complete import auto_complete_bookings
+
+
+def _overdue(db, provider_id, price, status="confirmed"):
+    at = datetime.now() - timedelta(days=1)
+    return db.bookings.insert_one({"provider_id": provider_id, "status": status, "price": price,
+                                   "scheduled_at": at.replace(hour=10, minute=0, second=0, microsecond=0)}).inserted_id
+
+
+def _day_bucket(db, provider_id):
+    day = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    return db.provider_daily_stats.find_one({"_id": f"{provider_id}:{day}"})
+
+
+def test_completes_overdue_bookings_and_records_revenue(db):
+    provider_id = ObjectId()
+    _overdue(db, provider_id, 40)
+    _overdue(db, provider_id, "10.5", status="pending")
+
+    stats = auto_complete_bookings(db.bookings, grace_hours=2, rollups_collection=db.provider_daily_stats)
+
+    assert stats["updated"] == 2
+    bucket = _day_bucket(db, provider_id)
+    assert bucket["counts"] == {"confirmed": -1, "pending": -1, "completed": 2}
+    assert bucket["revenue"] == 50.5
+
+
+def test_bookings_completed_by_another_writer_are_not_counted_twice(db):
+    provider_id = ObjectId()
+    raced = _overdue(db, provider_id, 40)
+    _overdue(db, provider_id, 25)
+
+    class Bookings:
+        """Bookings collection where another writer completes one booking mid-sweep."""
+
+        def __init__(self, collection):
+            self.collection = collection
+
+        def find(self, *args, **kwargs):
+            return self.collection.find(*args, **kwargs)
+
+        def update_many(self, query, update):
+            self.collection.update_one({"_id": raced},
+                                       {"$set": {"status": "completed", "updated_at": datetime(2026, 1, 1)}})
+            return self.collection.update_many(query, update)
+
+    stats = auto_complete_bookings(Bookings(db.bookings), grace_hours=2, chunk_size=10,
+                                   rollups_collection=db.provider_daily_stats)
+
+    assert stats["updated"] == 1
+    bucket = _day_bucket(db, provider_id)
+    assert bucket["counts"] == {"confirmed": -1, "completed": 1}
+    assert bucket["revenue"] == 25
+
+
+def test_rollup_failure_does_not_stop_the_sweep(db):
+    provider_id = ObjectId()
+    for _ in range(3):
+        _overdue(db, provider_id, 10)
+
+    class BrokenRollups:
+        def bulk_write(self, ops, ordered=True):
+            raise RuntimeError("rollups unavailable")
+
+    stats = auto_complete_bookings(db.bookings, grace_hours=2, chunk_size=1, rollups_collection=BrokenRollups())
+
+    assert stats["updated"] == 3
+    assert db.bookings.count_documents({"status": "completed"}) == 3
@@ -0,0 +1,168 @@
+from datetime import datetime
+import pytest
+from bson.objectid import ObjectId
+from models.booking import ensure_booking_indexes
+from utils.availability import slot_for_status
+
+
+@pytest.fixture
+def service(db):
+    ensure_booking_indexes(db)
+    provider_id = ObjectId()
+    service_id = db.services.insert_one({"title": "Pottery class", "price": "25.50",
+                                         "created_by": str(provider_id)}).inserted_id
+    return {"id": str(service_id), "provider_id": provider_id}
+
+
+def _book(client, auth, service, consumer_id, when="2030-05-01T10:15:00Z"):
+    return client.post("/api/bookings/create", headers=auth(consumer_id), json={
+        "service": service["id"], "booking_date": when, "client_email": "a@example.com"
+    })
+
+
+def _set_status(client, auth, user_id, booking_id, status):
+    return client.put(f"/api/bookings/update-status/{booking_id}", headers=auth(user_id), json={"status": status})
+
+
+def test_slot_for_status():
+    at = datetime(2026, 5, 1, 10, 30)
+    assert slot_for_status({"scheduled_at": at, "slot_start": datetime(2026, 5, 1, 10)}, "cancelled", 60) is None
+    assert slot_for_status({"scheduled_at": at}, "confirmed", 60) == datetime(2026, 5, 1, 10)
+    assert slot_for_status({"booking_datetime": at}, "pending", 30) == datetime(2026, 5, 1, 10, 30)
+    assert slot_for_status({}, "pending", 60) is None
+
+
+def test_same_slot_cannot_be_booked_twice(client, auth, service):
+    assert _book(client, auth, service, ObjectId()).status_code == 201
+    assert _book(client, auth, service, ObjectId(), "2030-05-01T10:45:00Z").status_code == 409
+
+
+def test_cancelling_gives_the_slot_back(client, auth, service, db):
+    consumer_id = ObjectId()
+    first = _book(client, auth, service, consumer_id).get_json()["booking_id"]
+    assert _set_status(client, auth, consumer_id, first, "cancelled").status_code == 200
+
+    assert "slot_start" not in db.bookings.find_one({"_id": ObjectId(first)})
+    assert _book(client, auth, service, ObjectId()).status_code == 201
+
+
+def test_reactivating_into_a_taken_slot_is_rejected(client, auth, service, db):
+    consumer_id = ObjectId()
+    first = _book(client, auth, service, consumer_id).get_json()["booking_id"]
+    _set_status(client, auth, consumer_id, first, "cancelled")
+    assert _book(client, auth, service, ObjectId()).status_code == 201
+
+    response = _set_status(client, auth, service["provider_id"], first, "confirmed")
+    assert response.status_code == 409
+    assert db.bookings.find_one({"_id": ObjectId(first)})["status"] == "cancelled"
+    assert db.bookings.count_documents({"status": {"$ne": "cancelled"}}) == 1
+
+
+def test_bulk_reactivation_into_a_taken_slot_is_rejected(client, auth, service):
+    consumer_id = ObjectId()
+    first = _book(client, auth, service, consumer_id).get_json()["booking_id"]
+    _set_status(client, auth, consumer_id, first, "cancelled")
+    _book(client, auth, service, ObjectId())
+
+    response = client.put("/api/bookings/bulk-status", headers=auth(service["provider_id"]),
+                          json={"booking_ids": [first], "status": "pending"})
+    assert response.status_code == 200
+    assert response.get_json()["results"][first]["status"] == 409
+
+
+def test_reactivating_into_a_free_slot_takes_it_again(client, auth, service, db):
+    consumer_id = ObjectId()
+    first = _book(client, auth, service, consumer_id).get_json()["booking_id"]
+    _set_status(client, auth, consumer_id, first, "cancelled")
+
+    assert _set_status(client, auth, service["provider_id"], first, "confirmed").status_code == 200
+    assert db.bookings.find_one({"_id": ObjectId(first)})["slot_start"] == datetime(2030, 5, 1, 10)
+    assert _book(client, auth, service, ObjectId()).status_code == 409
+
+
+def test_slot_index_failure_is_reported(db):
+    class Logger:
+        def __init__(self):
+            self.errors = []
+
+        def error(self, msg):
+            self.errors.append(msg)
+
+    class FailingSlotIndex:
+        def __init__(self, collection):
+            self.collection = collection
+
+        def create_index(self, keys, **kwargs):
+            if kwargs.get("name") == "provider_slot_unique":
+                raise RuntimeError("index build failed")
+            return self.collection.create_index(keys, **kwargs)
+
+    class Db:
+        def __getattr__(self, name):
+            return FailingSlotIndex(db[name]) if name == "bookings" else db[name]
+
+        def __getitem__(self, name):
+            return db[name]
+
+    logger = Logger()
+    ensure_booking_indexes(Db(), logger=logger)
+    assert len(logger.errors) == 1 and "provider_slot_unique" in logger.errors[0]
+
+
+def _stale_read(monkeypatch, method, status):
+    """Make the route's first bookings read see `status`, as if it raced another writer."""
+    import routes.bookings as routes
+    real = getattr(routes.bookings_collection, method)
+    calls = []
+
+    def stale(*args, **kwargs):
+        calls.append(1)
+        result = real(*args, **kwargs)
+        if len(calls) > 1:
+            return result
+        if method == "find_one":
+            return dict(result, status=status)
+        return [dict(doc, status=status) for doc in result]
+
+    monkeypatch.setattr(routes.bookings_collection, method, stale)
+
+
+def test_status_change_that_lost_a_race_is_rejected(client, auth, service, db, monkeypatch):
+    first = _book(client, auth, service, ObjectId()).get_json()["booking_id"]
+    assert _set_status(client, auth, service["provider_id"], first, "completed").status_code == 200
+    before = db.provider_daily_stats.find_one({})
+
+    _stale_read(monkeypatch, "find_one", "pending")
+    assert _set_status(client, auth, service["provider_id"], first, "completed").status_code == 409
+    assert db.provider_daily_stats.find_one({}) == before
+
+
+def test_bulk_status_change_that_lost_a_race_is_rejected(client, auth, service, db, monkeypatch):
+    stale = _book(client, auth, service, ObjectId()).get_json()["booking_id"]
+    fresh = _book(client, auth, service, ObjectId(), "2030-05-01T12:00:00Z").get_json()["booking_id"]
+    _set_status(client, auth, service["provider_id"], stale, "confirmed")
+
+    _stale_read(monkeypatch, "find", "pending")
+    response = client.put("/api/bookings/bulk-status", headers=auth(service["provider_id"]),
+                          json={"booking_ids": [stale, fresh], "status": "completed"})
+    body = response.get_json()
+    assert body["updated"] == 1
+    assert body["results"][stale]["status"] == 409
+    assert body["results"][fresh]["status"] == 200
+    assert db.bookings.find_one({"_id": ObjectId(stale)})["status"] == "confirmed"
+    counts = db.provider_daily_stats.find_one({})["counts"]
+    assert counts == {"pending": 0, "confirmed": 1, "completed": 1}
+
+
+def test_availability_rejects_malformed_ids(client, auth):
+    for params in ("provider_id=not-an-id", "service_id=123"):
+        response = client.get(f"/api/bookings/availability?{params}", headers=auth(ObjectId()))
+        assert response.status_code == 400
+
+
+def test_availability_lists_booked_slots(client, auth, service):
+    _book(client, auth, service, ObjectId())
+    response = client.get(f"/api/bookings/availability?service_id={service['id']}&start=2030-05-01&days=1",
+                          headers=auth(ObjectId()))
+    assert response.status_code == 200
+    assert response.get_json()["booked"] == ["2030-05-01T10:00:00"]
@@ -0,0 +1,30 @@
+from utils.cache import MemoryBackend, SQLiteBackend, ServiceCache, default_backend_kind
+
+
+def test_memory_backend_hands_out_copies():
+    cache = ServiceCache(MemoryBackend(), ttl=60)
+    stored = {"_id": "s1", "title": "Pottery", "tags": ["clay"]}
+    cache.get_service("s1", lambda: stored)
+    stored["title"] = "changed by the loader's caller"
+
+    first = cache.get_service("s1", lambda: None)
+    first["tags"].append("mutated")
+    second = cache.get_service("s1", lambda: None)
+
+    assert second == {"_id": "s1", "title": "Pottery", "tags": ["clay"]}
+
+
+def test_sqlite_backend_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = ServiceCache(SQLiteBackend(path), ttl=60)
+    worker_b = ServiceCache(SQLiteBackend(path), ttl=60)
+    worker_a.get_service("s1", lambda: {"_id": "s1", "title": "Old"})
+    assert worker_b.get_service("s1", lambda: None)["title"] == "Old"
+
+    worker_a.invalidate_service("s1")
+    assert worker_b.get_service("s1", lambda: {"_id": "s1", "title": "New"})["title"] == "New"
+
+
+def test_several_workers_default_to_the_shared_backend():
+    assert default_backend_kind(1) == "memory"
+    assert default_backend_kind(4) == "sqlite"
@@ -0,0 +1,69 @@
+import os
+import pytest
+from Crypto.Cipher import AES
+from utils import encryption
+from utils.encryption import encrypt, decrypt, encrypt_many, decrypt_many, is_current, HEADER_SIZE
+
+CURRENT = bytes(range(32))
+PREVIOUS = bytes(range(32, 64))
+
+
+def legacy_encrypt(text, key):
+    """An "iv:ciphertext" hex string as older releases wrote them."""
+    data = text.encode("utf-8")
+    pad_length = 16 - len(data) % 16
+    iv = os.urandom(16)
+    encrypted = AES.new(key, AES.MODE_CBC, iv).encrypt(data + bytes([pad_length]) * pad_length)
+    return iv.hex() + ":" + encrypted.hex()
+
+
+@pytest.fixture(autouse=True)
+def keys(monkeypatch):
+    monkeypatch.setattr(encryption, "ENCRYPTION_KEY", CURRENT)
+    monkeypatch.setattr(encryption, "PREVIOUS_KEYS", [PREVIOUS])
+    monkeypatch.setattr(encryption, "LEGACY_KEY", CURRENT)
+
+
+def test_round_trip_of_mixed_lengths():
+    texts = ["", "a", "x" * 15, "y" * 16, "z" * 47, "émail@example.com"]
+    values = encrypt_many(texts)
+    assert decrypt_many(values) == texts
+    assert all(is_current(value) for value in values)
+
+
+def test_output_is_standard_aes_cbc():
+    [value] = encrypt_many(["hello, batch world! " * 3])
+    iv = value[HEADER_SIZE - 16:HEADER_SIZE]
+    padded = AES.new(CURRENT, AES.MODE_CBC, iv).decrypt(value[HEADER_SIZE:])
+    assert padded[:-padded[-1]].decode("utf-8") == "hello, batch world! " * 3
+
+
+def test_decrypts_legacy_and_previous_key_values_together():
+    old = encrypt_many(["rotated"], key=PREVIOUS)[0]
+    assert not is_current(old)
+    values = [legacy_encrypt("legacy", CURRENT), old, encrypt_many(["current"])[0]]
+    assert decrypt_many(values) == ["legacy", "rotated", "current"]
+    assert decrypt(old) == "rotated"
+
+
+def test_rejects_malformed_and_unknown_key_values():
+    with pytest.raises(ValueError):
+        decrypt_many([b"\x01" + os.urandom(20)])
+    with pytest.raises(ValueError):
+        decrypt_many(encrypt_many(["secret"], key=os.urandom(32)))
+
+
+def test_new_values_are_readable_while_a_legacy_key_is_set(monkeypatch, client, db):
+    # Mid-rotation: hex strings still belong to the previous key
+    monkeypatch.setattr(encryption, "LEGACY_KEY", PREVIOUS)
+    value = encrypt("new.user@example.com")
+    assert is_current(value)
+    assert decrypt(value) == "new.user@example.com"
+    assert decrypt(legacy_encrypt("old.user@example.com", PREVIOUS)) == "old.user@example.com"
+
+    credentials = {"email": "new.user@example.com", "password": "pw-123456"}
+    assert client.post("/api/users/register", json=credentials).status_code == 201
+    assert is_current(db.users.find_one({})["email"])
+    response = client.post("/api/users/login", json=credentials)
+    assert response.status_code == 200
+    assert response.get_json()["user"]["email"] == "new.user@example.com"
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import pytest
+from bson.objectid import ObjectId
+from flask_jwt_extended import jwt_required
+from utils.idempotency import idempotent
+
+
+@pytest.fixture
+def keys(db):
+    return db.idempotency_keys
+
+
+@pytest.fixture
+def calls(app, keys):
+    """Register /echo and /boom behind the decorator; returns the list of handler runs."""
+    runs = []
+
+    @app.route("/echo", methods=["POST"])
+    @jwt_required()
+    @idempotent(keys)
+    def echo():
+        runs.append("echo")
+        return {"n": len(runs)}, 201
+
+    @app.route("/boom", methods=["POST"])
+    @jwt_required()
+    @idempotent(keys)
+    def boom():
+        runs.append("boom")
+        raise RuntimeError("handler failed")
+
+    return runs
+
+
+def _post(client, auth, path, key, user_id="user-1", body=None):
+    return client.post(path, headers=auth(user_id, **{"Idempotency-Key": key}), json=body or {"a": 1})
+
+
+def test_retry_replays_the_stored_response(client, auth, calls):
+    first = _post(client, auth, "/echo", "k1")
+    second = _post(client, auth, "/echo", "k1")
+
+    assert first.status_code == second.status_code == 201
+    assert second.get_json() == first.get_json() == {"n": 1}
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert calls == ["echo"]
+
+
+def test_keys_are_scoped_per_caller(client, auth, calls):
+    _post(client, auth, "/echo", "k1", user_id="user-1")
+    _post(client, auth, "/echo", "k1", user_id="user-2")
+    assert calls == ["echo", "echo"]
+
+
+def test_key_reused_with_another_body_is_rejected(client, auth, calls):
+    _post(client, auth, "/echo", "k1")
+    assert _post(client, auth, "/echo", "k1", body={"a": 2}).status_code == 422
+    assert calls == ["echo"]
+
+
+def test_retry_while_in_progress_gets_409(client, auth, calls, keys):
+    keys.insert_one({"_id": "user-1:/echo:k1", "state": "in_progress", "attempt": "other",
+                     "started_at": datetime.now(), "created_at": datetime.now()})
+
+    assert _post(client, auth, "/echo", "k1").status_code == 409
+    assert calls == []
+
+
+def test_stale_in_progress_record_is_taken_over(client, auth, calls, keys):
+    stale = datetime.now() - timedelta(minutes=10)
+    keys.insert_one({"_id": "user-1:/echo:k1", "state": "in_progress", "attempt": "dead-worker",
+                     "started_at": stale, "created_at": stale})
+
+    response = _post(client, auth, "/echo", "k1")
+    assert response.status_code == 201
+    record = keys.find_one({"_id": "user-1:/echo:k1"})
+    assert record["state"] == "done" and record["attempt"] != "dead-worker"
+    assert _post(client, auth, "/echo", "k1").headers["Idempotent-Replayed"] == "true"
+    assert calls == ["echo"]
+
+
+def test_handler_exception_frees_the_key(app, client, auth, calls, keys):
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    assert _post(client, auth, "/boom", "k1").status_code == 500
+    assert keys.count_documents({}) == 0
+    assert _post(client, auth, "/boom", "k1").status_code == 500
+    assert calls == ["boom", "boom"]
+
+
+def test_booking_create_is_not_repeated(client, auth, db):
+    service_id = db.services.insert_one({"title": "Pottery class", "price": 25,
+                                         "created_by": str(ObjectId())}).inserted_id
+    body = {"service": str(service_id), "booking_date": "2030-05-01T10:00:00Z", "client_email": "a@example.com"}
+    headers = auth(ObjectId(), **{"Idempotency-Key": "book-1"})
+
+    first = client.post("/api/bookings/create", headers=headers, json=body)
+    retry = client.post("/api/bookings/create", headers=headers, json=body)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json()["booking_id"] == first.get_json()["booking_id"]
+    assert db.bookings.count_documents({}) == 1
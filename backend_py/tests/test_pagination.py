@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from bson.objectid import ObjectId
+from utils.pagination import encode_cursor, decode_cursor
+
+GEO_CURSOR = ((int, float), ObjectId)
+
+
+def _token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    oid = ObjectId()
+    created = datetime(2026, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor(created, oid), (datetime, ObjectId)) == [created, oid]
+    assert decode_cursor(encode_cursor(12.5, oid), GEO_CURSOR) == [12.5, oid]
+
+
+@pytest.mark.parametrize("token", [
+    "not base64 !!",
+    _token({"a": 1}),
+    _token([{"$oid": "not-an-object-id"}, 1]),
+    _token([{"$date": "yesterday"}, {"$oid": str(ObjectId())}]),
+])
+def test_malformed_tokens(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("payload", [
+    [],
+    [1.5],
+    [1.5, {"$oid": str(ObjectId())}, 3],
+    ["far", {"$oid": str(ObjectId())}],
+    [True, {"$oid": str(ObjectId())}],
+    [1.5, str(ObjectId())],
+    [None, None],
+])
+def test_wrong_shape_or_types(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(_token(payload), GEO_CURSOR)
+
+
+def test_non_finite_distance():
+    token = base64.urlsafe_b64encode(f'[NaN, {{"$oid": "{ObjectId()}"}}]'.encode()).decode()
+    with pytest.raises(ValueError):
+        decode_cursor(token, GEO_CURSOR)
+
+
+@pytest.mark.parametrize("payload", [[1.5], ["far", {"$oid": str(ObjectId())}], {"x": 1}])
+def test_nearby_rejects_bad_cursors_with_400(client, payload):
+    response = client.get("/api/services/nearby", query_string={
+        "lat": 21.1, "lng": 79.0, "limit": 5, "cursor": _token(payload)
+    })
+    assert response.status_code == 400
+
+
+def test_booking_history_rejects_bad_cursors_with_400(client, auth):
+    response = client.get("/api/bookings/provider-history", headers=auth(ObjectId()),
+                          query_string={"cursor": _token([1, 2])})
+    assert response.status_code == 400
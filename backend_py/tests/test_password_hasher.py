@@ -0,0 +1,80 @@
+import threading
+import time
+import pytest
+from utils import password_hasher as module
+from utils.password_hasher import PasswordHasher, HasherBusy
+
+FAST_METHOD = "pbkdf2:sha256:1000"
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=2, max_queue=2)
+    stored = hasher.hash("s3cret")
+    assert hasher.verify(stored, "s3cret")
+    assert not hasher.verify(stored, "wrong")
+    assert hasher.stats()["completed"] == 3
+
+
+def test_needs_rehash_when_the_method_changes():
+    old = PasswordHasher(method="pbkdf2:sha256:500").hash("pw")
+    hasher = PasswordHasher(method=FAST_METHOD)
+    assert hasher.needs_rehash(old)
+    assert not hasher.needs_rehash(hasher.hash("pw"))
+
+
+@pytest.fixture
+def blocked(monkeypatch):
+    """Make every hash wait until the returned event is set."""
+    release = threading.Event()
+    real = module.generate_password_hash
+
+    def slow_hash(password, method):
+        release.wait(5)
+        return real(password, method)
+
+    monkeypatch.setattr(module, "generate_password_hash", slow_hash)
+    yield release
+    release.set()
+
+
+def test_rejects_beyond_workers_plus_queue(blocked):
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=1, max_queue=1, timeout=5)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(hasher.hash("pw"))) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    wait_for(lambda: hasher.stats()["queue_depth"] == 1)
+
+    with pytest.raises(HasherBusy):
+        hasher.hash("pw")
+    assert hasher.stats()["rejected"] == 1
+
+    blocked.set()
+    for caller in callers:
+        caller.join(5)
+    assert len(results) == 2
+
+
+def test_slow_hash_times_out(blocked):
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=1, max_queue=0, timeout=0.05)
+    with pytest.raises(HasherBusy) as error:
+        hasher.hash("pw")
+    assert error.value.retry_after >= 1
+    assert hasher.stats()["timeouts"] == 1
+
+
+def test_rehash_later_skips_when_busy(blocked):
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=1, max_queue=0, timeout=5)
+    done = []
+    assert hasher.rehash_later("pw", done.append)
+    assert not hasher.rehash_later("pw", done.append)
+    blocked.set()
+    wait_for(lambda: done)
+    assert not hasher.needs_rehash(done[0])
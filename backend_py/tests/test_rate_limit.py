@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+from utils.rate_limit import SQLiteStorage
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite://{tmp_path / 'ratelimit.sqlite3'}"
+
+
+def test_registered_for_the_sqlite_scheme(uri):
+    storage = storage_from_string(uri)
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.check()
+
+
+def test_counters_expire(uri):
+    storage = SQLiteStorage(uri)
+    assert storage.incr("k", expiry=1) == 1
+    assert storage.incr("k", expiry=1, amount=2) == 3
+    assert storage.get("k") == 3
+    assert time.time() < storage.get_expiry("k") <= time.time() + 1
+
+    time.sleep(1.05)
+    assert storage.get("k") == 0
+    assert storage.incr("k", expiry=1) == 1
+
+
+def test_clear_and_reset(uri):
+    storage = SQLiteStorage(uri)
+    storage.incr("a", 60)
+    storage.incr("b", 60)
+    storage.clear("a")
+    assert storage.get("a") == 0 and storage.get("b") == 1
+    assert storage.reset() == 1
+    assert storage.get("b") == 0
+
+
+def test_fixed_window_limit(uri):
+    limiter = FixedWindowRateLimiter(SQLiteStorage(uri))
+    limit = parse("3/minute")
+    assert [limiter.hit(limit, "user:1") for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(limit, "user:2")
+
+
+def test_sliding_window_counter_limit(uri):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    limit = parse("3/minute")
+    assert [limiter.hit(limit, "ip:1.2.3.4") for _ in range(4)] == [True, True, True, False]
+    stats = limiter.get_window_stats(limit, "ip:1.2.3.4")
+    assert stats.remaining == 0
+    limiter.clear(limit, "ip:1.2.3.4")
+    assert limiter.hit(limit, "ip:1.2.3.4")
+
+
+def test_previous_window_is_weighted(uri, monkeypatch):
+    storage = SQLiteStorage(uri)
+    # 15s into a 60s window, so 45/60 of the previous window still counts
+    monkeypatch.setattr("utils.rate_limit.time.time", lambda: 60 * 1000 + 15)
+    assert all(storage.acquire_sliding_window_entry("k", limit=10, expiry=60) for _ in range(10))
+    monkeypatch.setattr("utils.rate_limit.time.time", lambda: 60 * 1001 + 15)
+
+    previous_count, previous_ttl, current_count, _ = storage.get_sliding_window("k", 60)
+    assert (previous_count, previous_ttl, current_count) == (10, 45.0, 0)
+    # 10 * 45/60 = 7.5 -> 7, so three more fit under a limit of 10
+    assert [storage.acquire_sliding_window_entry("k", limit=10, expiry=60) for _ in range(4)] == [
+        True, True, True, False
+    ]
+
+
+def _hammer(uri, attempts, results):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    limit = parse("50/day")  # a window boundary mid-test would blur the count
+    results.put(sum(limiter.hit(limit, "shared") for _ in range(attempts)))
+
+
+def test_counts_are_exact_across_processes(uri):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_hammer, args=(uri, 40, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+    assert sum(results.get(timeout=5) for _ in workers) == 50
@@ -0,0 +1,30 @@
+import threading
+from pymongo.errors import ServerSelectionTimeoutError
+from utils.scheduler import LeaseScheduler
+
+
+def test_job_set_up_is_retried_until_mongo_is_reachable(db):
+    scheduler = LeaseScheduler(db, poll_seconds=0.01)
+    ran = threading.Event()
+    scheduler.register("job", ran.set, interval=3600)
+    scheduler.is_leader = True
+
+    ensure = scheduler._ensure_job_docs
+    attempts = []
+
+    def flaky_ensure():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ServerSelectionTimeoutError("connection refused")
+        ensure()
+
+    scheduler._ensure_job_docs = flaky_ensure
+    runner = threading.Thread(target=scheduler._run_loop, daemon=True)
+    runner.start()
+    try:
+        assert ran.wait(5)
+    finally:
+        scheduler._stop.set()
+        runner.join(5)
+    assert len(attempts) == 3
+    assert db.scheduler_jobs.find_one({"_id": "job"})["runs"] == 1
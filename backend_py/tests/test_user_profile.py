@@ -0,0 +1,46 @@
+import os
+import stat
+from bson.objectid import ObjectId
+from utils import encryption
+from utils.cache import SQLiteBackend
+from utils.user_profile import ProfileCache
+
+
+def test_profile_is_read_once_then_served_from_cache(db):
+    user_id = db.users.insert_one({"name": "Ada", "role": "consumer"}).inserted_id
+    cache = ProfileCache(SQLiteBackend(":memory:"), ttl=60)
+
+    assert cache.get(db.users, str(user_id))["name"] == "Ada"
+    db.users.update_one({"_id": user_id}, {"$set": {"name": "Changed"}})
+    assert cache.get(db.users, str(user_id))["name"] == "Ada"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get(db.users, str(ObjectId())) is None
+
+
+def test_invalidation_reaches_other_workers(db, tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    user_id = db.users.insert_one({"name": "Ada", "role": "consumer"}).inserted_id
+    worker_a = ProfileCache(SQLiteBackend(path), ttl=60)
+    worker_b = ProfileCache(SQLiteBackend(path), ttl=60)
+    worker_b.get(db.users, str(user_id))
+
+    # save_user_details on worker A: write, then drop the cached view
+    db.users.update_one({"_id": user_id}, {"$set": {"name": "Ada Lovelace"}})
+    worker_a.invalidate(str(user_id))
+
+    assert worker_b.get(db.users, str(user_id))["name"] == "Ada Lovelace"
+
+
+def test_shared_cache_file_is_private_and_holds_no_plaintext_email(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(encryption, "ENCRYPTION_KEY", bytes(range(32)))
+    path = tmp_path / "profiles.sqlite3"
+    user_id = db.users.insert_one({"name": "Ada", "role": "consumer",
+                                   "email": encryption.encrypt("ada@example.com")}).inserted_id
+    cache = ProfileCache(SQLiteBackend(str(path)), ttl=60)
+
+    assert cache.get(db.users, str(user_id))["email"] == "ada@example.com"
+    assert cache.get(db.users, str(user_id))["email"] == "ada@example.com"
+    assert cache.hits == 1
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    for name in os.listdir(tmp_path):
+        assert b"ada@example.com" not in (tmp_path / name).read_bytes()
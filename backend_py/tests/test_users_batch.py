@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def users(db):
+    me = db.users.insert_one({"name": "Me", "role": "consumer", "age": 30}).inserted_id
+    provider = db.users.insert_one({"name": "Provider", "role": "provider", "age": 41}).inserted_id
+    stranger = db.users.insert_one({"name": "Stranger", "role": "provider", "age": 52}).inserted_id
+    return me, provider, stranger
+
+
+def _batch(client, auth, user_id, body):
+    return client.post("/api/users/batch", headers=auth(user_id), json=body)
+
+
+@pytest.mark.parametrize("collection", ["bookings", "bookings_archive"])
+def test_personal_fields_for_counterparties_in_hot_and_archived_bookings(client, auth, db, users, collection):
+    me, provider, stranger = users
+    db[collection].insert_one({"consumer_id": me, "provider_id": provider, "status": "completed"})
+
+    response = _batch(client, auth, me, {"ids": [str(provider), str(stranger)], "fields": ["name", "age"]})
+    assert response.status_code == 200
+    found = response.get_json()["users"]
+    assert found[str(provider)] == {"name": "Provider", "age": 41}
+    assert found[str(stranger)] == {"name": "Stranger"}
+
+
+@pytest.mark.parametrize("fields", ["name,age", {"name": 1}, [], ["name", 3], [["name"]], None])
+def test_fields_must_be_a_list_of_names(client, auth, users, fields):
+    me, provider, _ = users
+    response = _batch(client, auth, me, {"ids": [str(provider)], "fields": fields})
+    assert response.status_code == 400
+
+
+def test_unknown_fields_are_rejected(client, auth, users):
+    me, provider, _ = users
+    assert _batch(client, auth, me, {"ids": [str(provider)], "fields": ["password"]}).status_code == 400
@@ -0,0 +1,201 @@
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from pymongo import UpdateOne
+from utils.availability import to_naive_utc
+
+# Per-provider daily buckets: {_id: "<provider_id>:<YYYY-MM-DD>", provider_id,
+# day, bookings, counts: {status: n}, revenue, rating_sum, rating_count}
+ROLLUP_COLLECTION = "provider_daily_stats"
+
+# Only completed bookings count towards revenue
+REVENUE_STATUS = "completed"
+
+
+def booking_day(booking):
+    """UTC midnight of the day a booking is scheduled for, or None if it has no date."""
+    value = booking.get("scheduled_at") or booking.get("booking_datetime")
+    if not isinstance(value, datetime):
+        return None
+    return to_naive_utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def price_value(price):
+    """
+    A stored price as a number for $inc. Prices are copied from the service
+    document, so they may be Decimal128 or, via the SQLite service cache, a
+    string; anything that is not a finite number counts as 0.
+    """
+    if isinstance(price, bool):
+        return 0
+    if isinstance(price, (int, float)):
+        return price if math.isfinite(price) else 0
+    if hasattr(price, "to_decimal"):
+        price = price.to_decimal()
+    try:
+        value = float(Decimal(str(price).strip()))
+    except (InvalidOperation, ValueError):
+        return 0
+    return value if math.isfinite(value) else 0
+
+
+def status_change_inc(booking, old_status, new_status):
+    """$inc for a booking moving from old_status (None when created) to new_status."""
+    price = price_value(booking.get("price"))
+    inc = {}
+    if old_status is None:
+        inc["bookings"] = 1
+    else:
+        inc[f"counts.{old_status.lower()}"] = -1
+        if old_status.lower() == REVENUE_STATUS:
+            inc["revenue"] = -price
+    inc[f"counts.{new_status}"] = inc.get(f"counts.{new_status}", 0) + 1
+    if new_status == REVENUE_STATUS:
+        inc["revenue"] = inc.get("revenue", 0) + price
+    return inc
+
+
+def rating_change_inc(old_rating, new_rating):
+    """$inc for feedback on a booking going from old_rating (None if new) to new_rating."""
+    inc = {"rating_sum": new_rating - (old_rating or 0)}
+    if old_rating is None:
+        inc["rating_count"] = 1
+    return inc
+
+
+def apply_rollup_incs(rollups_collection, changes):
+    """
+    Fold (booking, inc) pairs into their daily buckets with one bulk_write,
+    merging changes that land in the same bucket. Bookings without a
+    scheduled date are skipped. Returns the number of buckets touched.
+    """
+    now = datetime.now()
+    buckets = {}
+    for booking, inc in changes:
+        day = booking_day(booking)
+        if day is None or not booking.get("provider_id"):
+            continue
+        key = (booking["provider_id"], day)
+        merged = buckets.setdefault(key, {})
+        for field, value in inc.items():
+            merged[field] = merged.get(field, 0) + value
+
+    ops = [
+        UpdateOne(
+            {"_id": f"{provider_id}:{day.strftime('%Y-%m-%d')}"},
+            {"$inc": inc, "$set": {"updated_at": now}, "$setOnInsert": {"provider_id": provider_id, "day": day}},
+            upsert=True
+        )
+        for (provider_id, day), inc in buckets.items() if inc
+    ]
+    if ops:
+        rollups_collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def provider_summary(rollups_collection, provider_id, start, end):
+    """
+    Daily series and totals for one provider over [start, end), read from the
+    rollup buckets (at most one document per day).
+    """
+    totals = {"bookings": 0, "counts": {}, "revenue": 0, "rating_sum": 0, "rating_count": 0}
+    days = []
+    cursor = rollups_collection.find(
+        {"provider_id": provider_id, "day": {"$gte": start, "$lt": end}},
+        {"_id": 0, "provider_id": 0}
+    ).sort("day", 1)
+    for bucket in cursor:
+        counts = {status: n for status, n in (bucket.get("counts") or {}).items() if n}
+        rating_count = bucket.get("rating_count", 0)
+        days.append({
+            "day": bucket["day"].strftime("%Y-%m-%d"),
+            "bookings": bucket.get("bookings", 0),
+            "counts": counts,
+            "revenue": round(bucket.get("revenue", 0), 2),
+            "rating_count": rating_count,
+            "average_rating": round(bucket.get("rating_sum", 0) / rating_count, 2) if rating_count else None
+        })
+        totals["bookings"] += bucket.get("bookings", 0)
+        totals["revenue"] += bucket.get("revenue", 0)
+        totals["rating_sum"] += bucket.get("rating_sum", 0)
+        totals["rating_count"] += rating_count
+        for status, n in counts.items():
+            totals["counts"][status] = totals["counts"].get(status, 0) + n
+
+    rating_sum = totals.pop("rating_sum")
+    totals["revenue"] = round(totals["revenue"], 2)
+    totals["average_rating"] = round(rating_sum / totals["rating_count"], 2) if totals["rating_count"] else None
+    return {"from": start.strftime("%Y-%m-%d"), "to": (end - timedelta(days=1)).strftime("%Y-%m-%d"),
+            "totals": totals, "days": days}
+
+
+def rebuild_rollups(db, batch_size=1000, logger=None):
+    """
+    Recompute every daily bucket from bookings (hot and archived) in one
+    aggregation and write them with batched bulk_write calls; buckets that
+    no booking contributes to any more are removed. Bookings written before
+    prices were stored take the current price of their service.
+    """
+    started = datetime.now()
+    rollups = db[ROLLUP_COLLECTION]
+    dated = {"$ifNull": ["$scheduled_at", "$booking_datetime"]}
+    pipeline = [
+        {"$match": {"$or": [{"scheduled_at": {"$type": "date"}}, {"booking_datetime": {"$type": "date"}}]}},
+        {"$unionWith": {"coll": "bookings_archive"}},
+        {"$match": {"$or": [{"scheduled_at": {"$type": "date"}}, {"booking_datetime": {"$type": "date"}}]}},
+        {"$lookup": {"from": "services", "localField": "service_id", "foreignField": "_id", "as": "service"}},
+        {"$project": {
+            "provider_id": 1,
+            "day": {"$dateTrunc": {"date": dated, "unit": "day"}},
+            "status": {"$toLower": "$status"},
+            "price": {"$convert": {
+                "input": {"$ifNull": ["$price", {"$arrayElemAt": ["$service.price", 0]}]},
+                "to": "double", "onError": 0, "onNull": 0
+            }},
+            "rating": "$feedback.rating"
+        }},
+        {"$group": {
+            "_id": {"provider_id": "$provider_id", "day": "$day", "status": "$status"},
+            "n": {"$sum": 1},
+            "revenue": {"$sum": {"$cond": [{"$eq": ["$status", REVENUE_STATUS]}, "$price", 0]}},
+            "rating_sum": {"$sum": {"$ifNull": ["$rating", 0]}},
+            "rating_count": {"$sum": {"$cond": [{"$gt": ["$rating", None]}, 1, 0]}}
+        }},
+        {"$group": {
+            "_id": {"provider_id": "$_id.provider_id", "day": "$_id.day"},
+            "bookings": {"$sum": "$n"},
+            "counts": {"$push": {"k": "$_id.status", "v": "$n"}},
+            "revenue": {"$sum": "$revenue"},
+            "rating_sum": {"$sum": "$rating_sum"},
+            "rating_count": {"$sum": "$rating_count"}
+        }}
+    ]
+
+    written = 0
+    ops = []
+    for row in db.bookings.aggregate(pipeline, allowDiskUse=True):
+        provider_id, day = row["_id"]["provider_id"], row["_id"]["day"]
+        ops.append(UpdateOne({"_id": f"{provider_id}:{day.strftime('%Y-%m-%d')}"}, {"$set": {
+            "provider_id": provider_id,
+            "day": day,
+            "bookings": row["bookings"],
+            "counts": {item["k"]: item["v"] for item in row["counts"] if item["k"]},
+            "revenue": row["revenue"],
+            "rating_sum": row["rating_sum"],
+            "rating_count": row["rating_count"],
+            "updated_at": started
+        }}, upsert=True))
+        if len(ops) >= batch_size:
+            rollups.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        rollups.bulk_write(ops, ordered=False)
+        written += len(ops)
+
+    # Anything neither rewritten above nor touched by a live write since has
+    # no bookings behind it any more
+    removed = rollups.delete_many({"$or": [{"updated_at": {"$lt": started}}, {"updated_at": {"$exists": False}}]}).deleted_count
+    if logger:
+        logger.info(f"Analytics: rebuilt {written} daily buckets, removed {removed}")
+    return {"buckets": written, "removed": removed}
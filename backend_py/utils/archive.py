@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne, DeleteOne
+
+# Bookings in these states never change again (apart from feedback, which
+# is only accepted until the booking is archived)
+TERMINAL_STATUSES = ["completed", "cancelled"]
+
+ARCHIVE_COLLECTION = "bookings_archive"
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def archive_bookings(bookings_collection, archive_collection, older_than_days,
+                     batch_size=DEFAULT_BATCH_SIZE, logger=None):
+    """
+    Move terminal bookings scheduled more than `older_than_days` ago from the
+    hot collection into the archive, one batch at a time.
+
+    Each batch is copied with an upserting bulk_write and only then deleted
+    from the hot collection, so a run that stops half way leaves at worst a
+    duplicate that the next run replaces. Each delete is guarded on the
+    updated_at that was copied (status and feedback writes both bump it), so
+    a booking written in between stays hot and its newer copy is archived
+    by a later run. Selection is served by the (status, scheduled_at) index.
+    """
+    started = time.monotonic()
+    now = datetime.now()
+    cutoff = now - timedelta(days=older_than_days)
+    query = {"status": {"$in": TERMINAL_STATUSES}, "scheduled_at": {"$lt": cutoff}}
+
+    moved = 0
+    batches = 0
+    while True:
+        docs = list(bookings_collection.find(query).limit(batch_size))
+        if not docs:
+            break
+        archive_collection.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, dict(doc, archived_at=now), upsert=True) for doc in docs],
+            ordered=False
+        )
+        # Only delete what is unchanged since it was copied
+        result = bookings_collection.bulk_write(
+            [DeleteOne({"_id": doc["_id"], "updated_at": doc.get("updated_at"), **query}) for doc in docs],
+            ordered=False
+        )
+        moved += result.deleted_count
+        batches += 1
+        if len(docs) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    stats = {
+        "moved": moved,
+        "batches": batches,
+        "cutoff": cutoff.isoformat(),
+        "elapsed_s": round(elapsed, 3)
+    }
+    if logger:
+        logger.info(f"Archive: moved {moved} bookings in {stats['elapsed_s']}s ({batches} batches)")
+    return stats
+
+
+def union_archive(match, *stages):
+    """
+    Aggregation stage that appends matching archived bookings to the
+    pipeline's results; extra stages (e.g. $sort/$limit) run on the archive
+    side before the union.
+    """
+    return {"$unionWith": {"coll": ARCHIVE_COLLECTION, "pipeline": [{"$match": match}, *stages]}}
+
+
+def wants_archive(request):
+    """True if the client asked for archived bookings via ?include_archive=true."""
+    return request.args.get("include_archive", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta
+from utils.analytics import apply_rollup_incs, status_change_inc
+
+# Statuses that can still be auto-completed; the capitalised forms are what
+# create_booking wrote before statuses were normalised to lowercase
+OPEN_STATUSES = ["pending", "confirmed", "Pending", "Confirmed"]
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# Fields the analytics rollups need to re-bucket a completed booking
+ROLLUP_FIELDS = {"provider_id": 1, "status": 1, "scheduled_at": 1, "booking_datetime": 1, "price": 1}
+
+
+def _sweep(bookings_collection, query, update, chunk_size, on_chunk=None, applied=None):
+    """
+    Select up to chunk_size matching ids, update them in one call, repeat.
+    on_chunk, if given, receives the documents (as read before the update)
+    that this update actually changed. When another writer got to some of a
+    chunk first, those are found by re-reading the chunk with `applied`, a
+    filter only documents written by this update match.
+    """
+    projection = ROLLUP_FIELDS if on_chunk else {"_id": 1}
+    updated = 0
+    chunks = 0
+    while True:
+        docs = list(bookings_collection.find(query, projection).limit(chunk_size))
+        ids = [doc["_id"] for doc in docs]
+        if not ids:
+            break
+        result = bookings_collection.update_many({"_id": {"$in": ids}, **query}, update)
+        updated += result.modified_count
+        if on_chunk:
+            if result.modified_count < len(ids):
+                changed = {doc["_id"] for doc in bookings_collection.find({"_id": {"$in": ids}, **applied}, {"_id": 1})}
+                docs = [doc for doc in docs if doc["_id"] in changed]
+            on_chunk(docs)
+        chunks += 1
+        if len(ids) < chunk_size:
+            break
+    return updated, chunks
+
+
+def auto_complete_bookings(bookings_collection, grace_hours=2, chunk_size=DEFAULT_CHUNK_SIZE, logger=None,
+                           rollups_collection=None):
+    """
+    Mark open bookings whose scheduled time is more than `grace_hours` in the
+    past as completed. Shared by PUT /api/bookings/auto-complete and the
+    scheduler job.
+
+    The main pass is served by the (status, scheduled_at) index. A second
+    pass picks up rows written before scheduled_at existed, using the
+    booking_datetime that create_booking has always stored, and fills in
+    scheduled_at while completing them; it finds nothing once
+    scripts/migrate_bookings.py has normalised the collection. Work is done in bounded chunks so a
+    large backlog never loads into memory at once. With rollups_collection,
+    each chunk's status changes are folded into the analytics rollups.
+    """
+    started = time.monotonic()
+    now = datetime.now()
+    cutoff = now - timedelta(hours=grace_hours)
+
+    # Matches only bookings completed by this run
+    applied = {"status": "completed", "updated_at": now}
+
+    def record_rollups(docs):
+        # The chunk is already completed; a rollup failure is logged and
+        # left to scripts/backfill_analytics.py rather than ending the sweep
+        try:
+            apply_rollup_incs(rollups_collection, [
+                (doc, status_change_inc(doc, doc.get("status"), "completed")) for doc in docs
+            ])
+        except Exception as e:
+            if logger:
+                logger.error(f"Auto-complete: error updating analytics rollups: {str(e)}")
+
+    on_chunk = record_rollups if rollups_collection is not None else None
+
+    updated, chunks = _sweep(
+        bookings_collection,
+        {"status": {"$in": OPEN_STATUSES}, "scheduled_at": {"$lt": cutoff}},
+        {"$set": {"status": "completed", "updated_at": now}},
+        chunk_size,
+        on_chunk,
+        applied
+    )
+    legacy_updated, legacy_chunks = _sweep(
+        bookings_collection,
+        {"scheduled_at": {"$exists": False}, "status": {"$in": OPEN_STATUSES},
+         "booking_datetime": {"$lt": cutoff}},
+        [{"$set": {"status": "completed", "updated_at": now, "scheduled_at": "$booking_datetime"}}],
+        chunk_size,
+        on_chunk,
+        applied
+    )
+
+    elapsed = time.monotonic() - started
+    total = updated + legacy_updated
+    stats = {
+        "updated": total,
+        "legacy_updated": legacy_updated,
+        "chunks": chunks + legacy_chunks,
+        "cutoff": cutoff.isoformat(),
+        "elapsed_s": round(elapsed, 3),
+        "per_second": round(total / elapsed, 1) if elapsed > 0 else None
+    }
+    if logger:
+        logger.info(f"Auto-complete: updated {total} bookings in {stats['elapsed_s']}s ({stats['chunks']} chunks)")
+    return stats
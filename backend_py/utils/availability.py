@@ -0,0 +1,127 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from bson.objectid import ObjectId
+
+
+def to_naive_utc(value):
+    """Normalise a datetime to naive UTC, the form PyMongo returns."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def slot_start_for(value, slot_minutes, utc_offset_minutes=0):
+    """
+    Floor a datetime to the start of its booking slot. Slots are aligned in
+    local time (UTC + utc_offset_minutes); the result is naive UTC.
+    """
+    offset = timedelta(minutes=utc_offset_minutes)
+    local = to_naive_utc(value) + offset
+    minutes = local.hour * 60 + local.minute
+    floored = minutes - minutes % slot_minutes
+    local = local.replace(hour=floored // 60, minute=floored % 60, second=0, microsecond=0)
+    return local - offset
+
+
+def slot_for_status(booking, new_status, slot_minutes, utc_offset_minutes=0):
+    """
+    The slot_start a booking holds after moving to new_status: None once
+    cancelled (the slot is given back), otherwise its current slot or, for a
+    booking reactivated after a cancellation, the slot of its scheduled time
+    again, so the unique slot index covers it. None if it has no date.
+    """
+    if new_status == "cancelled":
+        return None
+    if booking.get("slot_start"):
+        return booking["slot_start"]
+    scheduled = booking.get("scheduled_at") or booking.get("booking_datetime")
+    if not isinstance(scheduled, datetime):
+        return None
+    return slot_start_for(scheduled, slot_minutes, utc_offset_minutes)
+
+
+class ProviderCalendar:
+    """
+    Per-process view of each provider's booked slots.
+
+    For every provider asked about, keeps a sorted list of upcoming booked
+    slot starts, loaded with one range query over the (provider_id,
+    slot_start) index and refreshed after `ttl` seconds. Range lookups are
+    a bisect, so free-slot views stay fast for providers with thousands of
+    bookings. The unique index, not this cache, is what prevents
+    double-booking; the cache only serves calendar reads.
+    """
+
+    def __init__(self, bookings_collection, ttl=60, max_providers=4096):
+        self.bookings = bookings_collection
+        self.ttl = ttl
+        self.max_providers = max_providers
+        self._lock = threading.Lock()
+        self._slots = {}   # provider_id -> (loaded_at, sorted [slot_start])
+
+    def _load(self, provider_id):
+        since = to_naive_utc(datetime.now(timezone.utc)) - timedelta(days=1)
+        cursor = self.bookings.find(
+            {"provider_id": ObjectId(provider_id), "slot_start": {"$gte": since}},
+            {"slot_start": 1, "_id": 0}
+        ).sort("slot_start", 1)
+        return [doc["slot_start"] for doc in cursor]
+
+    def _get(self, provider_id):
+        key = str(provider_id)
+        with self._lock:
+            entry = self._slots.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        slots = self._load(key)
+        with self._lock:
+            if len(self._slots) >= self.max_providers:
+                self._slots.clear()
+            self._slots[key] = (time.monotonic(), slots)
+        return slots
+
+    def add(self, provider_id, slot_start):
+        with self._lock:
+            entry = self._slots.get(str(provider_id))
+            if entry is not None:
+                pos = bisect_left(entry[1], slot_start)
+                if pos == len(entry[1]) or entry[1][pos] != slot_start:
+                    insort(entry[1], slot_start)
+
+    def remove(self, provider_id, slot_start):
+        with self._lock:
+            entry = self._slots.get(str(provider_id))
+            if entry is not None:
+                pos = bisect_left(entry[1], slot_start)
+                if pos < len(entry[1]) and entry[1][pos] == slot_start:
+                    del entry[1][pos]
+
+    def booked_between(self, provider_id, start, end):
+        """Booked slot starts in [start, end), in order."""
+        slots = self._get(provider_id)
+        with self._lock:
+            return slots[bisect_left(slots, start):bisect_left(slots, end)]
+
+    def free_slots(self, provider_id, start, end, slot_minutes, day_start_hour, day_end_hour,
+                   utc_offset_minutes=0):
+        """
+        Free slot starts in [start, end) within working hours, which are given
+        in local time (UTC + utc_offset_minutes). Slots in the past are skipped.
+        """
+        booked = set(self.booked_between(provider_id, start, end))
+        offset = timedelta(minutes=utc_offset_minutes)
+        step = timedelta(minutes=slot_minutes)
+        now = to_naive_utc(datetime.now(timezone.utc))
+        free = []
+        local_day = (start + offset).replace(hour=0, minute=0, second=0, microsecond=0)
+        while local_day - offset < end:
+            slot = local_day + timedelta(hours=day_start_hour) - offset
+            day_end = local_day + timedelta(hours=day_end_hour) - offset
+            while slot + step <= day_end:
+                if start <= slot < end and slot >= now and slot not in booked:
+                    free.append(slot)
+                slot += step
+            local_day += timedelta(days=1)
+        return free
@@ -0,0 +1,255 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """
+    Per-process LRU cache with a TTL on every entry.
+
+    Values are deep-copied on the way in and out, so a caller that mutates
+    what it stored or got back cannot change the cached copy. Invalidation
+    only reaches this process: with several gunicorn workers use
+    SQLiteBackend, or other workers serve stale entries until their TTL.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Host-local cache shared by every gunicorn worker through one SQLite file.
+
+    Values are stored as JSON, so only JSON-ready documents (string _id)
+    should be cached. Put the file on tmpfs (e.g. /dev/shm) for best latency.
+    LRU order is tracked with an access timestamp; the oldest entries are
+    trimmed once the table grows past max_entries.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self.evictions = 0
+        if path != ":memory:":
+            # Owner-only, whatever the umask: cached documents may be personal
+            # data, and SQLite gives the -wal/-shm files the same mode
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        conn.commit()
+
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload), so key them by pid
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] < now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, default=str), expires_at, now)
+        )
+        # Trimming needs a COUNT, so only do it every so often
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._trim(conn)
+
+    def _trim(self, conn):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def default_backend_kind(workers):
+    """memory for a single worker; sqlite when several workers must see each other's invalidations."""
+    return "sqlite" if workers > 1 else "memory"
+
+
+def make_backend(kind, max_entries=1024, path=None):
+    """Build a cache backend from config; returns None when caching is disabled."""
+    if kind == "memory":
+        return MemoryBackend(max_entries)
+    if kind == "sqlite":
+        return SQLiteBackend(path or os.path.join("/tmp", "craftconnect-cache.sqlite3"), max_entries)
+    return None
+
+
+class ReadThroughCache:
+    """
+    Hit/miss-counted read-through over a cache backend; the shared core of
+    ServiceCache and the login profile cache (utils/user_profile.py). With
+    no backend configured every read goes straight to the loader.
+    """
+
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _read_through(self, key, loader):
+        if self.backend is None:
+            return loader()
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def _store(self, key, value):
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def _drop(self, key):
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "entries": len(self.backend) if self.backend else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.backend.evictions if self.backend else 0,
+            "ttl": self.ttl
+        }
+
+
+class ServiceCache(ReadThroughCache):
+    """
+    Read-through cache for catalog reads.
+
+    Single services are cached under their id and dropped when that service is
+    written. Query results (title search, nearby) are keyed by a catalog
+    version stamp that every write replaces, so a write invalidates all of
+    them at once without tracking which results contained which service.
+    With no backend configured every call goes straight to the loader.
+    """
+
+    VERSION_KEY = "catalog:version"
+
+    def _version(self):
+        version = self.backend.get(self.VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(self.VERSION_KEY, version)
+        return version
+
+    def get_service(self, service_id, loader):
+        """Return the cached service document, calling loader() on a miss."""
+        return self._read_through(f"service:{service_id}", loader)
+
+    def get_query(self, namespace, params, loader):
+        """Return a cached query result keyed by namespace and normalised params."""
+        if self.backend is None:
+            return loader()
+        normalized = json.dumps(sorted(params.items()), separators=(",", ":"), default=str)
+        return self._read_through(f"{namespace}:{self._version()}:{normalized}", loader)
+
+    def invalidate_service(self, service_id):
+        """Drop one service and every cached query result."""
+        if self.backend is None:
+            return
+        self.backend.delete(f"service:{service_id}")
+        self.backend.set(self.VERSION_KEY, uuid.uuid4().hex)
+
+
+# Shared per-process instance; configured from app.py
+service_cache = ServiceCache()
@@ -7,22 +7,144 @@ ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY");
 if ENCRYPTION_KEY:
     ENCRYPTION_KEY = bytes.fromhex(ENCRYPTION_KEY)
 
+# Keys that older values may still be encrypted with (comma-separated hex),
+# kept while scripts/rotate_encryption_key.py moves them to ENCRYPTION_KEY
+PREVIOUS_KEYS = [bytes.fromhex(k.strip()) for k in os.getenv("ENCRYPTION_PREVIOUS_KEYS", "").split(",") if k.strip()]
+
+# Key used for legacy "iv:ciphertext" hex strings, which do not record their
+# key; defaults to the current key
+LEGACY_KEY = bytes.fromhex(os.getenv("ENCRYPTION_LEGACY_KEY")) if os.getenv("ENCRYPTION_LEGACY_KEY") else ENCRYPTION_KEY
+
+# Binary format: version (1) | key id (4) | iv (16) | AES-CBC ciphertext
+BINARY_VERSION = 1
+KEY_ID_SIZE = 4
+HEADER_SIZE = 1 + KEY_ID_SIZE + 16
+
 def encrypt(text):
-    iv = os.urandom(16)
-    cipher = AES.new(ENCRYPTION_KEY, AES.MODE_CBC, iv)
-    pad_length = 16 - (len(text.encode('utf-8')) % 16)
-    padded_text = text + chr(pad_length) * pad_length
-    encrypted = cipher.encrypt(padded_text.encode('utf-8'))
-    return iv.hex() + ":" + encrypted.hex()
+    """
+    Encrypt one string in the binary format under the current key. Legacy
+    "iv:ciphertext" hex strings are only read, never written, so new values
+    stay readable while ENCRYPTION_LEGACY_KEY points at an older key.
+    """
+    return encrypt_many([text])[0]
 
 def decrypt(enc_text):
+    if isinstance(enc_text, (bytes, bytearray)):
+        return decrypt_many([enc_text])[0]
     iv_hex, encrypted_hex = enc_text.split(":")
     iv = bytes.fromhex(iv_hex)
     encrypted = bytes.fromhex(encrypted_hex)
-    cipher = AES.new(ENCRYPTION_KEY, AES.MODE_CBC, iv)
+    cipher = AES.new(LEGACY_KEY, AES.MODE_CBC, iv)
     padded_text = cipher.decrypt(encrypted)
     pad_length = padded_text[-1]
     return padded_text[: -pad_length].decode('utf-8')
 
 def hash_email(email):
-    return hashlib.sha256(email.encode('utf-8')).hexdigest()
\ No newline at end of file
+    return hashlib.sha256(email.encode('utf-8')).hexdigest()
+
+def key_id(key):
+    """Short fingerprint stored with binary values so they name their key."""
+    return hashlib.sha256(key).digest()[:KEY_ID_SIZE]
+
+def _keyring():
+    keys = {key_id(k): k for k in PREVIOUS_KEYS}
+    if ENCRYPTION_KEY:
+        keys[key_id(ENCRYPTION_KEY)] = ENCRYPTION_KEY
+    return keys
+
+def is_current(value):
+    """True if value is in the binary format under the current key (nothing to rotate)."""
+    return (isinstance(value, (bytes, bytearray)) and len(value) > HEADER_SIZE
+            and value[1:1 + KEY_ID_SIZE] == key_id(ENCRYPTION_KEY))
+
+def _xor(a, b):
+    # One big-integer XOR is far cheaper than a Python loop over blocks
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+def encrypt_many(texts, key=None):
+    """
+    Encrypt a sequence of strings into the compact binary format (stored by
+    PyMongo as BSON binary, about half the size of the hex strings).
+
+    The output is standard AES-CBC, but instead of one cipher per value the
+    CBC chain is run for all values at once: block k of every value is
+    XORed with its chaining block and encrypted in a single ECB call, so the
+    number of cipher calls is the length of the longest value in blocks.
+    """
+    key = key or ENCRYPTION_KEY
+    if not texts:
+        return []
+    ecb = AES.new(key, AES.MODE_ECB)
+    header = bytes([BINARY_VERSION]) + key_id(key)
+
+    padded = []
+    for text in texts:
+        data = text.encode('utf-8')
+        pad_length = 16 - len(data) % 16
+        padded.append(data + bytes([pad_length]) * pad_length)
+    ivs = os.urandom(16 * len(padded))
+
+    # Output buffer laid out value by value: header | iv | ciphertext
+    offsets = []
+    pos = 0
+    for data in padded:
+        offsets.append(pos)
+        pos += HEADER_SIZE + len(data)
+    buffer = bytearray(pos)
+    for i, start in enumerate(offsets):
+        buffer[start:start + 1 + KEY_ID_SIZE] = header
+        buffer[start + 1 + KEY_ID_SIZE:start + HEADER_SIZE] = ivs[16 * i:16 * i + 16]
+
+    # chain[i] is where value i's previous cipher block lives in the buffer (its iv first)
+    chain = [start + 1 + KEY_ID_SIZE for start in offsets]
+    active = list(range(len(padded)))
+    block = 0
+    while active:
+        plain = b"".join(padded[i][block:block + 16] for i in active)
+        previous = b"".join(buffer[chain[i]:chain[i] + 16] for i in active)
+        encrypted = ecb.encrypt(_xor(plain, previous))
+        for n, i in enumerate(active):
+            chain[i] = offsets[i] + HEADER_SIZE + block
+            buffer[chain[i]:chain[i] + 16] = encrypted[16 * n:16 * n + 16]
+        block += 16
+        active = [i for i in active if len(padded[i]) > block]
+
+    return [bytes(buffer[start:start + HEADER_SIZE + len(data)]) for start, data in zip(offsets, padded)]
+
+def decrypt_many(values):
+    """
+    Decrypt a sequence of values in either format (binary from
+    encrypt_many, or the legacy hex strings from encrypt) into strings.
+
+    CBC decryption has no chain dependency, so all binary values under one
+    key are decrypted with a single ECB call into a preallocated buffer and
+    one XOR against their previous blocks.
+    """
+    keys = _keyring()
+    results = [None] * len(values)
+    by_key = {}
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            results[i] = decrypt(value)
+            continue
+        if len(value) < HEADER_SIZE + 16 or (len(value) - HEADER_SIZE) % 16 or value[0] != BINARY_VERSION:
+            raise ValueError("Malformed encrypted value")
+        by_key.setdefault(bytes(value[1:1 + KEY_ID_SIZE]), []).append(i)
+
+    for kid, indexes in by_key.items():
+        key = keys.get(kid)
+        if key is None:
+            raise ValueError("Value is encrypted with a key that is not configured")
+        encrypted = b"".join(values[i][HEADER_SIZE:] for i in indexes)
+        # Each block is XORed with the block before it, the iv for the first
+        previous = b"".join(values[i][1 + KEY_ID_SIZE:-16] for i in indexes)
+        buffer = bytearray(len(encrypted))
+        AES.new(key, AES.MODE_ECB).decrypt(encrypted, output=buffer)
+        plain = _xor(buffer, previous)
+        pos = 0
+        for i in indexes:
+            size = len(values[i]) - HEADER_SIZE
+            pad_length = plain[pos + size - 1]
+            results[i] = plain[pos:pos + size - pad_length].decode('utf-8')
+            pos += size
+    return results
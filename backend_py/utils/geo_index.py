@@ -0,0 +1,127 @@
+import math
+from utils.memory_index import RefreshableIndex
+
+# Matches the sphere MongoDB uses for spherical $geoNear distances
+EARTH_RADIUS_M = 6378100.0
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+
+def haversine_m(lng1, lat1, lng2, lat2):
+    """Great-circle distance in meters between two [lng, lat] points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _point(service):
+    loc = service.get("location")
+    if not isinstance(loc, dict):
+        return None
+    coords = loc.get("coordinates")
+    if not isinstance(coords, (list, tuple)) or len(coords) != 2:
+        return None
+    try:
+        return float(coords[0]), float(coords[1])
+    except (TypeError, ValueError):
+        return None
+
+
+class GridIndex(RefreshableIndex):
+    """
+    Fixed lat/lng grid over service locations, answering radius queries for
+    /api/services/nearby without a database round trip.
+
+    Each cell holds the services whose point falls inside it; a query visits
+    only the cells overlapping the search circle's bounding box and measures
+    exact haversine distances for those candidates. Stored documents are the
+    JSON-ready service dicts (string _id) returned by the route.
+    """
+
+    def __init__(self, refresh_seconds=300, cell_degrees=0.05):
+        super().__init__(refresh_seconds)
+        self.cell_degrees = cell_degrees
+        self._cells = {}     # (row, col) -> {service_id: (lng, lat)}
+        self._docs = {}      # service_id -> service dict
+        self._cell_of = {}   # service_id -> (row, col)
+
+    def _cell(self, lng, lat):
+        return (int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees)))
+
+    def _add_locked(self, service_id, service):
+        point = _point(service)
+        if point is None:
+            return
+        doc = dict(service)
+        doc["_id"] = service_id
+        cell = self._cell(*point)
+        self._cells.setdefault(cell, {})[service_id] = point
+        self._docs[service_id] = doc
+        self._cell_of[service_id] = cell
+
+    def _remove_locked(self, service_id):
+        cell = self._cell_of.pop(service_id, None)
+        self._docs.pop(service_id, None)
+        if cell is None:
+            return
+        members = self._cells.get(cell)
+        if members is not None:
+            members.pop(service_id, None)
+            if not members:
+                del self._cells[cell]
+
+    def add(self, service_id, service):
+        """Index (or re-index) a service document."""
+        with self._lock:
+            self._remove_locked(str(service_id))
+            self._add_locked(str(service_id), service)
+
+    def remove(self, service_id):
+        with self._lock:
+            self._remove_locked(str(service_id))
+
+    def _build_state(self, docs):
+        fresh = GridIndex(cell_degrees=self.cell_degrees)
+        for service in docs:
+            fresh._add_locked(str(service["_id"]), service)
+        return {"_cells": fresh._cells, "_docs": fresh._docs, "_cell_of": fresh._cell_of}
+
+    def query(self, lng, lat, radius_m):
+        """
+        Return [(distance_m, service), ...] within radius_m of (lng, lat),
+        ordered by distance and then _id. Services are shared, not copied;
+        callers must copy before mutating.
+        """
+        dlat = radius_m / METERS_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = min(180.0, dlat / cos_lat)
+        row_min, col_min = self._cell(lng - dlng, lat - dlat)
+        row_max, col_max = self._cell(lng + dlng, lat + dlat)
+
+        results = []
+        with self._lock:
+            # Small searches walk the bounding box; huge ones walk the occupied cells
+            box_cells = (row_max - row_min + 1) * (col_max - col_min + 1)
+            if box_cells <= len(self._cells):
+                cells = ((r, c) for r in range(row_min, row_max + 1) for c in range(col_min, col_max + 1))
+            else:
+                cells = (key for key in self._cells
+                         if row_min <= key[0] <= row_max and col_min <= key[1] <= col_max)
+            for cell in cells:
+                members = self._cells.get(cell)
+                if not members:
+                    continue
+                for service_id, (s_lng, s_lat) in members.items():
+                    distance = haversine_m(lng, lat, s_lng, s_lat)
+                    if distance <= radius_m:
+                        results.append((distance, self._docs[service_id]))
+        results.sort(key=lambda item: (item[0], item[1]["_id"]))
+        return results
+
+    def __len__(self):
+        return len(self._docs)
+
+
+# Shared per-process instance used by routes/services.py
+nearby_index = GridIndex()
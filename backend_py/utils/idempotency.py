@@ -0,0 +1,108 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from pymongo.errors import DuplicateKeyError
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# How long an in-progress record blocks retries before it is taken to belong
+# to a worker that died mid-request; override with IDEMPOTENCY_LEASE_SECONDS
+DEFAULT_LEASE_SECONDS = 60
+
+
+def ensure_idempotency_indexes(db, ttl_seconds=86400):
+    """Expire stored idempotency records after ttl_seconds (the _id is already unique)."""
+    try:
+        db.idempotency_keys.create_index("created_at", expireAfterSeconds=ttl_seconds, background=True)
+    except Exception:
+        pass
+
+
+def idempotent(collection):
+    """
+    Route decorator adding Idempotency-Key support to a POST endpoint.
+
+    The first request with a key inserts a placeholder record; the unique _id
+    (identity + path + key) means concurrent duplicates fail that insert
+    instead of running the handler again. Once the handler finishes its
+    response is stored on the record, and retries with the same key and
+    body get that response back without touching anything else. A retry
+    that arrives while the first request is still running gets 409, and a
+    key reused with a different body gets 422. 5xx responses and handler
+    exceptions drop the record, so the client can retry them. A record
+    still in progress after the lease (IDEMPOTENCY_LEASE_SECONDS) is from
+    a worker that died; the next retry takes it over atomically, and the
+    stale worker, whose attempt id no longer matches, cannot store or drop it.
+
+    Apply below @jwt_required() so the caller's identity is known.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return make_response({"msg": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}, 400)
+
+            identity = get_jwt_identity() or request.remote_addr
+            record_id = f"{identity}:{request.path}:{key}"
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+            # Identifies this run of the handler, so only it can finish or drop the record
+            attempt = {"_id": record_id, "attempt": uuid.uuid4().hex}
+            now = datetime.now()
+
+            try:
+                collection.insert_one({
+                    **attempt,
+                    "state": "in_progress",
+                    "request_hash": request_hash,
+                    "started_at": now,
+                    "created_at": now
+                })
+            except DuplicateKeyError:
+                existing = collection.find_one({"_id": record_id})
+                if existing is not None and existing.get("state") == "done":
+                    if existing.get("request_hash") != request_hash:
+                        return make_response({"msg": "Idempotency-Key was already used with a different request"}, 422)
+                    response = current_app.response_class(
+                        existing["body"], status=existing["status_code"], mimetype=existing.get("mimetype")
+                    )
+                    response.headers["Idempotent-Replayed"] = "true"
+                    return response
+                # Still running, unless its lease has run out
+                lease = timedelta(seconds=current_app.config.get("IDEMPOTENCY_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+                claimed = collection.find_one_and_update(
+                    {"_id": record_id, "state": "in_progress",
+                     "$or": [{"started_at": {"$lt": now - lease}}, {"started_at": {"$exists": False}}]},
+                    {"$set": {"attempt": attempt["attempt"], "request_hash": request_hash, "started_at": now}}
+                )
+                if claimed is None:
+                    return make_response({"msg": "A request with this Idempotency-Key is still in progress"}, 409)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                collection.delete_one(attempt)
+                raise
+
+            if response.status_code >= 500:
+                collection.delete_one(attempt)
+                return response
+
+            collection.update_one(
+                attempt,
+                {"$set": {
+                    "state": "done",
+                    "status_code": response.status_code,
+                    "mimetype": response.mimetype,
+                    "body": response.get_data(as_text=True)
+                }}
+            )
+            return response
+        return wrapper
+    return decorator
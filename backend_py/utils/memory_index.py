@@ -0,0 +1,55 @@
+import threading
+import time
+
+
+class RefreshableIndex:
+    """
+    Base class for per-process catalog indexes loaded from a MongoDB collection.
+
+    Subclasses implement _build_state(docs), returning the attributes that make
+    up a freshly built index; rebuild() swaps them in under the lock. Writes
+    made through this worker are applied directly by the subclass, writes
+    made by other workers are picked up by maybe_refresh().
+    """
+
+    projection = None
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._refreshing = False
+
+    @property
+    def ready(self):
+        return self._built_at is not None
+
+    def _build_state(self, docs):
+        raise NotImplementedError
+
+    def rebuild(self, collection):
+        """Load the whole index from `collection` and swap it in."""
+        state = self._build_state(collection.find({}, self.projection).batch_size(1000))
+        with self._lock:
+            self.__dict__.update(state)
+            self._built_at = time.monotonic()
+
+    def maybe_refresh(self, collection, logger=None):
+        """Rebuild in a background thread if the index is older than refresh_seconds."""
+        if self._built_at is not None and time.monotonic() - self._built_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.rebuild(collection)
+            except Exception as e:
+                if logger:
+                    logger.error(f"Error rebuilding {type(self).__name__}: {str(e)}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, daemon=True).start()
@@ -0,0 +1,69 @@
+import base64
+import json
+import math
+from datetime import datetime
+from bson.objectid import ObjectId
+
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+
+def parse_limit(value, default=DEFAULT_PAGE_LIMIT, maximum=MAX_PAGE_LIMIT):
+    """Parse a ?limit= query value and clamp it to [1, maximum]."""
+    if value is None or value == "":
+        return default
+    limit = int(value)
+    return max(1, min(limit, maximum))
+
+
+def _encode_value(value):
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort-key values of the last returned document into an opaque,
+    URL-safe token. Supports ObjectId and datetime values.
+    """
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, types=None):
+    """
+    Decode a token produced by encode_cursor back into a list of values.
+    With `types` (one type or tuple of types per position, e.g.
+    (datetime, ObjectId)), the token must hold exactly that many values of
+    those types. Raises ValueError on malformed input.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(values, list):
+            raise ValueError("cursor payload must be a list")
+        values = [_decode_value(v) for v in values]
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if types is not None:
+        if len(values) != len(types):
+            raise ValueError(f"Invalid cursor: expected {len(types)} values, got {len(values)}")
+        for value, expected in zip(values, types):
+            # bool is an int subclass, but never a valid sort key here
+            if isinstance(value, bool) or not isinstance(value, expected):
+                raise ValueError("Invalid cursor: unexpected value type")
+            if isinstance(value, float) and not math.isfinite(value):
+                raise ValueError("Invalid cursor: value must be finite")
+    return values
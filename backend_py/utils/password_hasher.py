@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time."""
+
+    def __init__(self, msg, retry_after=1):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Bounded pool for password hashing and verification.
+
+    Every hash runs on a small dedicated thread pool (hashlib's scrypt and
+    PBKDF2 release the GIL, so request threads keep serving other routes
+    while hashes run). At most `max_workers + max_queue` hashes are admitted
+    at once; callers beyond that get HasherBusy immediately instead of
+    queueing behind a burst. `method` is passed to werkzeug, e.g.
+    "scrypt:32768:8:1" or "pbkdf2:sha256:600000"; stored hashes made with
+    a different method are reported by needs_rehash().
+    """
+
+    def __init__(self, method="scrypt", max_workers=2, max_queue=32, timeout=10):
+        self.configure(method, max_workers, max_queue, timeout)
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)   # seconds queued + hashing, most recent calls
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+
+    def configure(self, method="scrypt", max_workers=2, max_queue=32, timeout=10):
+        old = getattr(self, "_executor", None)
+        self.method = method
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._admitted = 0
+        self._prefix = None
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def _method_prefix(self):
+        # werkzeug fills in default parameters, so learn the full prefix once
+        if self._prefix is None:
+            self._prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+        return self._prefix
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HasherBusy("Password hashing queue is full")
+        with self._stats_lock:
+            self._admitted += 1
+        # Latency includes time spent queued, which is what callers feel
+        started = time.monotonic()
+
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                with self._stats_lock:
+                    self._latencies.append(time.monotonic() - started)
+                    self.completed += 1
+                    self._admitted -= 1
+                self._slots.release()
+
+        return self._executor.submit(run)
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise HasherBusy("Password hashing timed out", retry_after=max(1, int(self.timeout)))
+
+    def hash(self, password):
+        """Hash a password on the pool; raises HasherBusy when saturated."""
+        return self._wait(self._submit(generate_password_hash, password, self.method))
+
+    def verify(self, stored_hash, password):
+        """Check a password on the pool; raises HasherBusy when saturated."""
+        return self._wait(self._submit(check_password_hash, stored_hash, password))
+
+    def needs_rehash(self, stored_hash):
+        """True if stored_hash was made with a different method or cost than configured."""
+        return not stored_hash.startswith(self._method_prefix() + "$")
+
+    def rehash_later(self, password, on_done):
+        """
+        Hash `password` with the current method in the background and call
+        on_done(new_hash). Skipped silently when the pool is busy; the next
+        login will try again.
+        """
+        try:
+            future = self._submit(generate_password_hash, password, self.method)
+        except HasherBusy:
+            return False
+
+        def callback(done):
+            if done.exception() is None:
+                on_done(done.result())
+                with self._stats_lock:
+                    self.rehashed += 1
+
+        future.add_done_callback(callback)
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            admitted = self._admitted
+            counters = {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rehashed": self.rehashed
+            }
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            "method": self.method,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(admitted, self.max_workers),
+            "queue_depth": max(0, admitted - self.max_workers),
+            **counters,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)}
+        }
+
+
+# Shared per-process instance; configured from app.py
+password_hasher = PasswordHasher()
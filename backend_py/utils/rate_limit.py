@@ -0,0 +1,198 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import request, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage, SlidingWindowCounterSupport
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Rate limit counters shared by every gunicorn worker on a host through one
+    SQLite file, registered with `limits` as the sqlite:// scheme, e.g.
+    RATELIMIT_STORAGE_URI=sqlite:///dev/shm/craftconnect-ratelimit.sqlite3.
+
+    Each check is one short write transaction (WAL, synchronous=OFF), so
+    counters are exact across processes; put the file on tmpfs to keep it
+    off the disk. Supports the fixed-window and sliding-window-counter
+    strategies.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.path = (uri or "")[len("sqlite://"):] or os.path.join("/tmp", "craftconnect-ratelimit.sqlite3")
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload), so key them by pid
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, conn, key, now):
+        row = conn.execute("SELECT value, expires_at FROM counters WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, None
+        return row[0], row[1]
+
+    def _add(self, conn, key, amount, expiry, now):
+        # A missing or expired counter starts over with a fresh expiry
+        value, expires_at = self._read(conn, key, now)
+        if expires_at is None:
+            value, expires_at = 0, now + expiry
+        conn.execute(
+            "INSERT OR REPLACE INTO counters (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value + amount, expires_at)
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+        return value + amount
+
+    def incr(self, key, expiry, amount=1):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            value = self._add(conn, key, amount, expiry, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def get(self, key):
+        return self._read(self._conn(), key, time.time())[0]
+
+    def get_expiry(self, key):
+        now = time.time()
+        expires_at = self._read(self._conn(), key, now)[1]
+        return expires_at if expires_at is not None else now
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn().execute("DELETE FROM counters").rowcount
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    # Sliding window counter: the current fixed window's count plus the
+    # previous window's count weighted by how much of it still overlaps
+    def _window_keys(self, key, expiry, now):
+        index = int(now // expiry)
+        return f"{key}/{index - 1}", f"{key}/{index}"
+
+    def _window_info(self, conn, key, expiry, now):
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count = self._read(conn, previous_key, now)[0]
+        current_count = self._read(conn, current_key, now)[0]
+        elapsed = now % expiry
+        previous_ttl = float(expiry - elapsed) if previous_count else 0.0
+        current_ttl = float(2 * expiry - elapsed)
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous_count, previous_ttl, current_count, _ = self._window_info(conn, key, expiry, now)
+            weighted = previous_count * previous_ttl / expiry + current_count
+            allowed = math.floor(weighted) + amount <= limit
+            if allowed:
+                # Keep the counter for two windows: it is the "previous" one next window
+                self._add(conn, self._window_keys(key, expiry, now)[1], amount, 2 * expiry, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def get_sliding_window(self, key, expiry):
+        return self._window_info(self._conn(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        for window_key in self._window_keys(key, expiry, time.time()):
+            self.clear(window_key)
+
+
+def rate_limit_key():
+    """
+    Limit by signed-in user when the request carries a valid JWT, otherwise
+    by client IP. Expired or malformed tokens count as anonymous.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity:
+        return f"user:{identity}"
+    return f"ip:{get_remote_address()}"
+
+
+def configured_limit(config_key, default):
+    """Limit string read from app.config at request time, e.g. RATE_LIMIT_LOGIN="10 per minute"."""
+    return lambda: current_app.config.get(config_key, default)
+
+
+class RateLimitMetrics:
+    """Per-process counters of rejected requests, by endpoint and by limit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.by_endpoint = {}
+        self.by_limit = {}
+        self.last_rejected_at = None
+
+    def on_breach(self, request_limit):
+        # Limiter on_breach hook; returning None keeps the default 429 response
+        endpoint = request.endpoint or request.path
+        limit = str(request_limit.limit)
+        with self._lock:
+            self.rejected += 1
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            self.by_limit[limit] = self.by_limit.get(limit, 0) + 1
+            self.last_rejected_at = time.time()
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rejected": self.rejected,
+                "by_endpoint": dict(self.by_endpoint),
+                "by_limit": dict(self.by_limit),
+                "last_rejected_at": self.last_rejected_at
+            }
+
+
+# Shared per-process instance, wired into the limiter in extensions.py
+rate_limit_metrics = RateLimitMetrics()
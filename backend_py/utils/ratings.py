@@ -0,0 +1,119 @@
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+
+def _average(rating_sum, rating_count):
+    return round(rating_sum / rating_count, 1) if rating_count else None
+
+
+def apply_rating_change(users_collection, provider_id, old_rating=None, new_rating=None):
+    """
+    Fold one feedback change into the provider's running rating aggregates
+    (providerDetails.rating_sum, rating_count and rating_histogram) with $inc.
+
+    old_rating is None for new feedback; both are set when feedback is edited.
+    average_rating is then refreshed from the values this $inc produced, and
+    only if no other change landed in between (that change refreshes it
+    instead), so the stored average always matches the final aggregates.
+    """
+    inc = {}
+    if old_rating is not None:
+        inc["providerDetails.rating_sum"] = -old_rating
+        inc["providerDetails.rating_count"] = -1
+        inc[f"providerDetails.rating_histogram.{old_rating}"] = -1
+    if new_rating is not None:
+        inc["providerDetails.rating_sum"] = inc.get("providerDetails.rating_sum", 0) + new_rating
+        inc["providerDetails.rating_count"] = inc.get("providerDetails.rating_count", 0) + 1
+        key = f"providerDetails.rating_histogram.{new_rating}"
+        inc[key] = inc.get(key, 0) + 1
+    if not inc:
+        return None
+
+    user = users_collection.find_one_and_update(
+        {"_id": ObjectId(provider_id)},
+        {"$inc": inc},
+        projection={"providerDetails.rating_sum": 1, "providerDetails.rating_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not user:
+        return None
+
+    details = user.get("providerDetails") or {}
+    rating_sum = details.get("rating_sum", 0)
+    rating_count = details.get("rating_count", 0)
+    users_collection.update_one(
+        {
+            "_id": user["_id"],
+            "providerDetails.rating_sum": rating_sum,
+            "providerDetails.rating_count": rating_count
+        },
+        {"$set": {"providerDetails.average_rating": _average(rating_sum, rating_count)}}
+    )
+    return {"rating_sum": rating_sum, "rating_count": rating_count,
+            "average_rating": _average(rating_sum, rating_count)}
+
+
+def rebuild_provider_ratings(bookings_collection, users_collection, batch_size=1000, logger=None,
+                             archive_collection=None):
+    """
+    Recompute every provider's rating aggregates from bookings in one
+    aggregation and write them back with batched bulk_write calls. Pass
+    archive_collection so feedback on archived bookings is counted too.
+    Providers that have aggregates but no remaining feedback are reset.
+    Returns the number of providers updated.
+    """
+    rated = {"feedback.rating": {"$exists": True}}
+    pipeline = [{"$match": rated}]
+    if archive_collection is not None:
+        pipeline.append({"$unionWith": {"coll": archive_collection.name, "pipeline": [{"$match": rated}]}})
+    pipeline += [
+        {"$group": {
+            "_id": "$provider_id",
+            "rating_sum": {"$sum": "$feedback.rating"},
+            "rating_count": {"$sum": 1},
+            **{
+                f"r{value}": {"$sum": {"$cond": [{"$eq": ["$feedback.rating", value]}, 1, 0]}}
+                for value in RATING_VALUES
+            }
+        }}
+    ]
+
+    updated = 0
+    rated_ids = set()
+    ops = []
+    for row in bookings_collection.aggregate(pipeline, allowDiskUse=True):
+        rated_ids.add(row["_id"])
+        ops.append(UpdateOne({"_id": row["_id"]}, {"$set": {
+            "providerDetails.rating_sum": row["rating_sum"],
+            "providerDetails.rating_count": row["rating_count"],
+            "providerDetails.rating_histogram": {str(v): row[f"r{v}"] for v in RATING_VALUES},
+            "providerDetails.average_rating": _average(row["rating_sum"], row["rating_count"])
+        }}))
+        if len(ops) >= batch_size:
+            updated += users_collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += users_collection.bulk_write(ops, ordered=False).modified_count
+
+    # Reset providers whose feedback has all gone
+    ops = []
+    for user in users_collection.find({"providerDetails.rating_count": {"$gt": 0}}, {"_id": 1}):
+        if user["_id"] in rated_ids:
+            continue
+        ops.append(UpdateOne({"_id": user["_id"]}, {"$set": {
+            "providerDetails.rating_sum": 0,
+            "providerDetails.rating_count": 0,
+            "providerDetails.rating_histogram": {str(v): 0 for v in RATING_VALUES},
+            "providerDetails.average_rating": None
+        }}))
+        if len(ops) >= batch_size:
+            updated += users_collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += users_collection.bulk_write(ops, ordered=False).modified_count
+
+    if logger:
+        logger.info(f"Rebuilt rating aggregates for {updated} providers")
+    return updated
@@ -1,74 +1,269 @@
 import threading
 import time
-from datetime import datetime, timedelta
-import requests
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
 import os
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from extensions import mongo
-from flask import current_app
-
-# Alternative more efficient version
-def auto_complete_bookings_task(app):
-    """Background task to auto-complete bookings using passed-in Flask app."""
-    try:
-        with app.app_context():
-            bookings_collection = mongo.db.bookings
-            cutoff_time = datetime.now()
-            
-            result = bookings_collection.update_many(
-                {
-                    '$and': [
-                        {'status': {'$nin': ['completed', 'cancelled']}},
-                        {
-                            '$or': [
-                                {'booking_datetime': {'$lt': cutoff_time}},
-                                {'booking_date': {'$lt': cutoff_time}},
-                                {'date': {'$lt': cutoff_time}},
-                                {'datetime': {'$lt': cutoff_time}}
-                            ]
-                        }
-                    ]
-                },
-                {'$set': {'status': 'completed'}}
-            )
-            
-            updated_count = result.modified_count
-            app.logger.info(f"Cron job: Auto-completed {updated_count} bookings at {datetime.now()}")
-            return updated_count
-            
-    except Exception as e:
-        # Use current_app logger if app is not available
-        try:
-            current_app.logger.error(f"Cron job error: {str(e)}")
-        except Exception:
-            print(f"Cron job error: {e}")
-        return 0
+from utils.auto_complete import auto_complete_bookings
+from utils.archive import archive_bookings, ARCHIVE_COLLECTION
+from utils.analytics import ROLLUP_COLLECTION
+
+def _utcnow():
+    # Naive UTC, which is what PyMongo hands back for stored datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Job:
+    def __init__(self, name, fn, interval, jitter=0, catch_up=True):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.catch_up = catch_up
+
+
+class LeaseScheduler:
+    """
+    Periodic job runner that is safe to start in every gunicorn worker.
+
+    Workers compete for a lease document in `scheduler_leases`; only the
+    holder runs jobs, and it renews the lease from a heartbeat thread. If the
+    holder dies its lease expires after `lease_seconds` and another worker
+    takes over. Each run is additionally claimed by atomically moving the
+    job's next_run_at in `scheduler_jobs`, so a slot runs at most once even
+    during a leader handover.
+
+    Job state (next run, last duration, recent history) lives in
+    `scheduler_jobs`, so schedules survive restarts. A job whose slot was
+    missed while no worker was running runs once on start-up when catch_up
+    is set, otherwise it waits for its next slot.
+    """
 
-def schedule_booking_completion(app):
-    """Scheduler function that runs the auto-completion task every hour"""
-    while True:
+    LEASE_ID = "scheduler"
+    HISTORY_LENGTH = 20
+
+    def __init__(self, db, lease_seconds=60, poll_seconds=5, logger=None):
+        self.leases = db.scheduler_leases
+        self.jobs_collection = db.scheduler_jobs
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.logger = logger
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs = {}
+        self.is_leader = False
+        self._started = False
+        self._stop = threading.Event()
+
+    def _log(self, level, msg):
+        if self.logger:
+            getattr(self.logger, level)(msg)
+        else:
+            print(msg)
+
+    def register(self, name, fn, interval, jitter=0, catch_up=True):
+        """Register fn() to run every `interval` seconds (plus up to `jitter`)."""
+        self.jobs[name] = Job(name, fn, interval, jitter, catch_up)
+
+    def _next_slot(self, job, after):
+        return after + timedelta(seconds=job.interval + random.uniform(0, job.jitter))
+
+    # --- leader election -------------------------------------------------
+
+    def _renew_lease(self):
+        now = _utcnow()
         try:
-            # Run the auto-completion task
-            completed_count = auto_complete_bookings_task(app)
-            
-            # Log the result
+            lease = self.leases.find_one_and_update(
+                {"_id": self.LEASE_ID, "$or": [{"owner": self.worker_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.worker_id, "expires_at": now + timedelta(seconds=self.lease_seconds),
+                          "heartbeat_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            leader = lease is not None and lease.get("owner") == self.worker_id
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            leader = False
+        if leader != self.is_leader:
+            self._log("info", f"Scheduler {self.worker_id} {'acquired' if leader else 'lost'} the lease")
+        self.is_leader = leader
+
+    def _release_lease(self):
+        self.leases.delete_one({"_id": self.LEASE_ID, "owner": self.worker_id})
+        self.is_leader = False
+
+    def _heartbeat_loop(self):
+        while not self._stop.is_set():
             try:
-                app.logger.info(f"[{datetime.now()}] Auto-completion cron job completed. Updated {completed_count} bookings.")
-            except Exception:
-                print(f"[{datetime.now()}] Auto-completion cron job completed. Updated {completed_count} bookings.")
-            
-            # Wait for 1 hour (3600 seconds) before running again
-            time.sleep(3600)
-            
+                self._renew_lease()
+            except Exception as e:
+                self.is_leader = False
+                self._log("error", f"Scheduler heartbeat error: {str(e)}")
+            self._stop.wait(self.lease_seconds / 3)
+
+    # --- job execution ---------------------------------------------------
+
+    def _ensure_job_docs(self):
+        now = _utcnow()
+        for job in self.jobs.values():
+            self.jobs_collection.update_one(
+                {"_id": job.name},
+                {"$setOnInsert": {"next_run_at": now, "runs": 0, "failures": 0, "history": []},
+                 "$set": {"interval": job.interval}},
+                upsert=True
+            )
+            if not job.catch_up:
+                # Skip slots missed while nobody was running
+                self.jobs_collection.update_one(
+                    {"_id": job.name, "next_run_at": {"$lt": now}},
+                    {"$set": {"next_run_at": self._next_slot(job, now)}}
+                )
+
+    def _claim(self, job, now):
+        """Atomically move the job's next slot forward; True if this worker won the run."""
+        claimed = self.jobs_collection.find_one_and_update(
+            {"_id": job.name, "next_run_at": {"$lte": now}},
+            {"$set": {"next_run_at": self._next_slot(job, now), "running_by": self.worker_id,
+                      "started_at": now}}
+        )
+        return claimed is not None
+
+    def _run(self, job):
+        started = _utcnow()
+        clock = time.monotonic()
+        error = None
+        result = None
+        try:
+            result = job.fn()
         except Exception as e:
-            print(f"[{datetime.now()}] Cron job error: {str(e)}")
-            # Wait 10 minutes before retrying if there's an error
-            time.sleep(600)
+            error = str(e)
+            self._log("error", f"Scheduler job {job.name} failed: {error}")
+        duration = round(time.monotonic() - clock, 3)
+        entry = {"started_at": started, "duration_s": duration, "ok": error is None,
+                 "worker": self.worker_id}
+        if error:
+            entry["error"] = error
+        elif isinstance(result, (int, float, str, dict)):
+            entry["result"] = result
+        self.jobs_collection.update_one(
+            {"_id": job.name},
+            {"$set": {"last_run_at": started, "last_duration_s": duration, "last_ok": error is None,
+                      "running_by": None},
+             "$inc": {"runs": 1, "failures": 0 if error is None else 1, "total_duration_s": duration},
+             "$push": {"history": {"$each": [entry], "$slice": -self.HISTORY_LENGTH}}}
+        )
+        self._log("info", f"Scheduler job {job.name} finished in {duration}s")
+
+    def _run_loop(self):
+        # _claim() only matches existing job docs, so keep retrying the
+        # set-up (e.g. MongoDB not up yet when the worker starts)
+        initialised = False
+        while not self._stop.is_set():
+            if not initialised:
+                try:
+                    self._ensure_job_docs()
+                    initialised = True
+                except Exception as e:
+                    self._log("error", f"Scheduler could not initialise jobs, retrying: {str(e)}")
+            if initialised and self.is_leader:
+                now = _utcnow()
+                for job in self.jobs.values():
+                    try:
+                        if self._claim(job, now):
+                            self._run(job)
+                    except Exception as e:
+                        self._log("error", f"Scheduler error on job {job.name}: {str(e)}")
+            self._stop.wait(self.poll_seconds)
+
+    # --- lifecycle -------------------------------------------------------
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._heartbeat_loop, name="scheduler-heartbeat", daemon=True).start()
+        threading.Thread(target=self._run_loop, name="scheduler-runner", daemon=True).start()
+        self._log("info", f"Scheduler {self.worker_id} started with jobs: {', '.join(self.jobs)}")
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self._release_lease()
+        except Exception:
+            pass
+
+    def status(self):
+        """Lease holder plus per-job schedule, run counts, durations and history."""
+        lease = self.leases.find_one({"_id": self.LEASE_ID}) or {}
+        jobs = []
+        for doc in self.jobs_collection.find({"_id": {"$in": list(self.jobs)}}):
+            runs = doc.get("runs", 0)
+            doc["name"] = doc.pop("_id")
+            doc["avg_duration_s"] = round(doc.get("total_duration_s", 0) / runs, 3) if runs else None
+            jobs.append(doc)
+        return {
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "lease": {"owner": lease.get("owner"), "expires_at": lease.get("expires_at")},
+            "jobs": jobs
+        }
+
+
+# Set by start_scheduler(); one per process
+scheduler = None
 
 def start_scheduler(app):
-    """Start the background scheduler thread; pass the Flask app instance."""
-    scheduler_thread = threading.Thread(target=schedule_booking_completion, args=(app,), daemon=True)
-    scheduler_thread.start()
-    try:
-        app.logger.info("Background booking auto-completion scheduler started")
-    except Exception:
-        print("Background booking auto-completion scheduler started")
\ No newline at end of file
+    """Start the lease-elected scheduler for this process; pass the Flask app instance."""
+    global scheduler
+    if scheduler is not None:
+        return scheduler
+
+    scheduler = LeaseScheduler(
+        mongo.db,
+        lease_seconds=int(app.config.get("SCHEDULER_LEASE_SECONDS", 60)),
+        poll_seconds=int(app.config.get("SCHEDULER_POLL_SECONDS", 5)),
+        logger=app.logger
+    )
+    scheduler.register(
+        "auto_complete_bookings",
+        lambda: auto_complete_job(app),
+        interval=int(app.config.get("AUTO_COMPLETE_INTERVAL_SECONDS", 3600)),
+        jitter=60
+    )
+    # Archival is off unless ARCHIVE_AFTER_DAYS is set
+    if int(app.config.get("ARCHIVE_AFTER_DAYS", 0)) > 0:
+        scheduler.register(
+            "archive_bookings",
+            lambda: archive_job(app),
+            interval=int(app.config.get("ARCHIVE_INTERVAL_SECONDS", 86400)),
+            jitter=300
+        )
+    scheduler.start()
+    return scheduler
+
+def auto_complete_job(app):
+    """Scheduler job: auto-complete overdue bookings; errors propagate to the run history."""
+    with app.app_context():
+        stats = auto_complete_bookings(
+            mongo.db.bookings,
+            grace_hours=app.config.get("AUTO_COMPLETE_GRACE_HOURS", 2),
+            chunk_size=app.config.get("AUTO_COMPLETE_CHUNK_SIZE", 5000),
+            logger=app.logger,
+            rollups_collection=mongo.db[ROLLUP_COLLECTION]
+        )
+        return {"updated": stats["updated"], "per_second": stats["per_second"]}
+
+def archive_job(app):
+    """Scheduler job: move old completed/cancelled bookings to the archive collection."""
+    with app.app_context():
+        stats = archive_bookings(
+            mongo.db.bookings,
+            mongo.db[ARCHIVE_COLLECTION],
+            older_than_days=int(app.config["ARCHIVE_AFTER_DAYS"]),
+            batch_size=app.config.get("ARCHIVE_BATCH_SIZE", 1000),
+            logger=app.logger
+        )
+        return {"moved": stats["moved"], "batches": stats["batches"]}
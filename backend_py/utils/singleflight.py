@@ -0,0 +1,101 @@
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, make_response, current_app
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block and receive the same result (or exception). Nothing
+    is cached after the call finishes. This is per-process, and only has an
+    effect when a worker serves requests concurrently (gunicorn --threads or
+    an async worker class).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once per in-flight key; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.executions + self.coalesced
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else None
+        }
+
+
+# Shared per-process instance for catalog reads
+catalog_flight = SingleFlight()
+
+
+def coalesce_get(flight, when=None):
+    """
+    Route decorator: identical concurrent GET requests (same path and
+    normalised query string) share one execution of the view and one
+    serialised response body. `when` can return False to opt a request out,
+    e.g. for streamed responses that cannot be shared.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or (when is not None and not when()):
+                return view(*args, **kwargs)
+
+            key = request.path + "?" + urlencode(sorted(request.args.items(multi=True)))
+
+            def run():
+                response = make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, response.mimetype
+
+            (body, status, mimetype), _ = flight.do(key, run)
+            return current_app.response_class(body, status=status, mimetype=mimetype)
+        return wrapper
+    return decorator
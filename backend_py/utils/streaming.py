@@ -0,0 +1,66 @@
+import csv
+import io
+from flask import current_app
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _dumps(doc):
+    # Use the app's JSON provider so streamed output matches jsonify()
+    return current_app.json.dumps(doc)
+
+
+def stream_json_array(docs, transform=None):
+    """
+    Yield a JSON array one document at a time so the full result set is never
+    held in memory. `docs` is usually a PyMongo cursor.
+    """
+    yield "["
+    first = True
+    for doc in docs:
+        if transform:
+            doc = transform(doc)
+        if first:
+            first = False
+            yield _dumps(doc)
+        else:
+            yield "," + _dumps(doc)
+    yield "]"
+
+
+def stream_ndjson(docs, transform=None):
+    """Yield one JSON document per line (newline-delimited JSON)."""
+    for doc in docs:
+        if transform:
+            doc = transform(doc)
+        yield _dumps(doc) + "\n"
+
+
+def stream_csv(docs, columns, transform=None):
+    """
+    Yield CSV text: a header row of `columns`, then one row per document.
+    Rows go through one small reusable buffer, so memory stays constant.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(columns)
+    yield flush()
+    for doc in docs:
+        if transform:
+            doc = transform(doc)
+        writer.writerow(["" if doc.get(column) is None else doc.get(column) for column in columns])
+        yield flush()
+
+
+def wants_ndjson(request):
+    """True if the client asked for NDJSON via ?format=ndjson or the Accept header."""
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
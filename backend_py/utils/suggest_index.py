@@ -0,0 +1,104 @@
+from bisect import bisect_left, insort
+from utils.memory_index import RefreshableIndex
+
+SEPARATOR = "\x00"
+
+
+def _normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def _terms_for(service):
+    """
+    Return the index keys ("term\x00Display") for a service document. Every word start in
+    the title is indexed, so "plu" and "emergency plu" both find
+    "Emergency Plumbing". Categories are indexed the same way when present.
+    """
+    terms = set()
+    for field in ("title", "category"):
+        value = service.get(field)
+        if not value or not isinstance(value, str):
+            continue
+        display = " ".join(value.split())
+        words = _normalize(value).split(" ")
+        for i in range(len(words)):
+            terms.add(" ".join(words[i:]) + SEPARATOR + display)
+    return terms
+
+
+class PrefixIndex(RefreshableIndex):
+    """
+    Sorted-array prefix index over service titles and categories.
+
+    Lookups are a bisect plus a short forward scan, so they never touch
+    MongoDB. Each gunicorn worker holds its own copy.
+    """
+
+    projection = {"title": 1, "category": 1}
+
+    def __init__(self, refresh_seconds=300):
+        super().__init__(refresh_seconds)
+        self._keys = []          # sorted "term\x00Display" strings
+        self._counts = {}        # key -> number of services contributing it
+        self._by_service = {}    # service_id -> set of keys
+
+    def _add_locked(self, service_id, service):
+        keys = _terms_for(service)
+        self._by_service[service_id] = keys
+        for key in keys:
+            count = self._counts.get(key, 0)
+            if count == 0:
+                insort(self._keys, key)
+            self._counts[key] = count + 1
+
+    def _remove_locked(self, service_id):
+        for key in self._by_service.pop(service_id, ()):
+            count = self._counts.get(key, 0) - 1
+            if count > 0:
+                self._counts[key] = count
+                continue
+            self._counts.pop(key, None)
+            pos = bisect_left(self._keys, key)
+            if pos < len(self._keys) and self._keys[pos] == key:
+                del self._keys[pos]
+
+    def add(self, service_id, service):
+        """Index (or re-index) a service document."""
+        with self._lock:
+            self._remove_locked(str(service_id))
+            self._add_locked(str(service_id), service)
+
+    def remove(self, service_id):
+        with self._lock:
+            self._remove_locked(str(service_id))
+
+    def _build_state(self, docs):
+        fresh = PrefixIndex()
+        for service in docs:
+            fresh._add_locked(str(service["_id"]), service)
+        return {"_keys": fresh._keys, "_counts": fresh._counts, "_by_service": fresh._by_service}
+
+    def suggest(self, prefix, limit=8):
+        """Return up to `limit` display strings whose words start with `prefix`."""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        scores = {}
+        with self._lock:
+            pos = bisect_left(self._keys, prefix)
+            # Scan a bounded window so very short prefixes stay cheap
+            end = min(len(self._keys), pos + limit * 20)
+            while pos < end and self._keys[pos].startswith(prefix):
+                key = self._keys[pos]
+                display = key.split(SEPARATOR, 1)[1]
+                scores[display] = scores.get(display, 0) + self._counts[key]
+                pos += 1
+        ranked = sorted(scores, key=lambda d: (-scores[d], len(d), d))
+        return ranked[:limit]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# Shared per-process instance used by routes/services.py
+suggest_index = PrefixIndex()
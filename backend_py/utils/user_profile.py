@@ -0,0 +1,79 @@
+from bson.objectid import ObjectId
+from utils.encryption import decrypt
+from utils.cache import ReadThroughCache
+
+# The only user fields the profile view reads
+PROFILE_FIELDS = {
+    "name": 1, "email": 1, "age": 1, "contact_no": 1, "role": 1,
+    "providerDetails": 1, "consumerDetails": 1
+}
+
+
+def build_profile(user):
+    """The user object the frontend expects, with the email decrypted."""
+    user_data = {
+        "id": str(user["_id"]),
+        "name": user.get("name"),
+        "email": decrypt(user.get("email")) if user.get("email") else None,
+        "age": user.get("age"),
+        "contact_no": user.get("contact_no"),
+        "role": user.get("role"),
+    }
+
+    # Add role-specific details if they exist
+    if user.get("role") == "provider" and user.get("providerDetails"):
+        user_data["providerDetails"] = user.get("providerDetails")
+    elif user.get("role") == "consumer" and user.get("consumerDetails"):
+        user_data["consumerDetails"] = user.get("consumerDetails")
+    return user_data
+
+
+def _cache_entry(user):
+    """
+    The profile view as cached: the email stays encrypted (binary values as
+    hex, legacy "iv:ciphertext" strings as they are), so a shared cache
+    file never holds PII in plaintext.
+    """
+    entry = build_profile({**user, "email": None})
+    email = user.get("email")
+    entry["email"] = email.hex() if isinstance(email, (bytes, bytearray)) else email
+    return entry
+
+
+def _from_cache_entry(entry):
+    email = entry.get("email")
+    if email:
+        email = decrypt(email if ":" in email else bytes.fromhex(email))
+    return {**entry, "email": email or None}
+
+
+class ProfileCache(ReadThroughCache):
+    """
+    Read-through cache of profile views, keyed by user id.
+
+    A hit skips the users lookup; only the email is decrypted, which is a
+    single AES call. Entries are dropped by save_user_details; changes made
+    elsewhere (e.g. rating aggregates) show up within `ttl` seconds. Use the
+    shared SQLite backend when running several workers so a drop reaches
+    all of them.
+    """
+
+    def get(self, users_collection, user_id):
+        """Return the profile for user_id, or None if the user does not exist."""
+        def _load():
+            user = users_collection.find_one({"_id": ObjectId(user_id)}, PROFILE_FIELDS)
+            return _cache_entry(user) if user else None
+        entry = self._read_through(f"profile:{user_id}", _load)
+        return _from_cache_entry(entry) if entry else None
+
+    def put(self, user):
+        """Build the profile from a user document already in hand and cache it."""
+        entry = self._store(f"profile:{user['_id']}", _cache_entry(user))
+        return _from_cache_entry(entry)
+
+    def invalidate(self, user_id):
+        self._drop(f"profile:{user_id}")
+
+
+# Shared per-process instance; configured from app.py
+profile_cache = ProfileCache()
@@ -1,9 +1,10 @@
-export const apiRequest = async (endpoint, method = "GET", body = null) => {
+export const apiRequest = async (endpoint, method = "GET", body = null, extraHeaders = {}) => {
   const token = localStorage.getItem("token");
 
   const headers = {
     "Content-Type": "application/json",
     Authorization: `Bearer ${token}`,
+    ...extraHeaders,
   };
 
   const config = {
@@ -26,15 +26,42 @@ const SearchBar = () => {
   ], []); // Empty dependency array means this will only be created once
 
   useEffect(() => {
-    if (query.trim()) {
-      const filtered = popularServices.filter(service => 
-        service.toLowerCase().includes(query.toLowerCase())
-      );
-      setSuggestions(filtered);
-    } else {
+    const trimmed = query.trim();
+    if (!trimmed) {
       setSuggestions([]);
+      return;
     }
-  }, [query, popularServices]); // popularServices is now memoized, so it won't trigger re-renders
+
+    // Fall back to the built-in list if the suggest endpoint is unavailable
+    const localMatches = () => popularServices.filter(service =>
+      service.toLowerCase().includes(trimmed.toLowerCase())
+    );
+
+    const controller = new AbortController();
+    // Debounce so we only ask the server once the user pauses typing
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `${process.env.REACT_APP_API_URL}/api/services/suggest?q=${encodeURIComponent(trimmed)}`,
+          { signal: controller.signal }
+        );
+        if (!response.ok) {
+          throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        const data = await response.json();
+        setSuggestions(data.suggestions && data.suggestions.length > 0 ? data.suggestions : localMatches());
+      } catch (err) {
+        if (err.name !== 'AbortError') {
+          setSuggestions(localMatches());
+        }
+      }
+    }, 150);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, popularServices]); // popularServices is memoized, so it won't trigger re-renders
 
   const handleSearch = () => {
     if (query.trim()) {
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import Header from "../components/Header";
 import Footer from "../components/Footer";
@@ -145,10 +145,19 @@ const ServiceDetail = () => {
     fetchServiceDetails();
   }, [id]);
 
+  // One key per booking attempt, reused if the same submission is retried
+  const idempotencyKeyRef = useRef(null);
+
   const handleBookingSubmit = async (e) => {
     e.preventDefault();
     
     try {
+      if (!idempotencyKeyRef.current) {
+        idempotencyKeyRef.current = window.crypto?.randomUUID
+          ? window.crypto.randomUUID()
+          : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+      }
+
       setBookingState(prev => ({ ...prev, status: "Processing..." }));
       
       const userData = JSON.parse(localStorage.getItem("user"));
@@ -163,7 +172,8 @@ const ServiceDetail = () => {
         booking_date: bookingState.data.booking_date,
         contact_number: bookingState.data.contact_number,
         special_instructions: bookingState.data.special_instructions
-      });
+      }, { "Idempotency-Key": idempotencyKeyRef.current });
+      idempotencyKeyRef.current = null;
       
       setBookingState(prev => ({ 
         ...prev, 
@@ -176,6 +186,10 @@ const ServiceDetail = () => {
       }, 5000);
     } catch (err) {
       console.error("Booking error:", err);
+      // Keep the key only for network failures, where the same request may be retried
+      if (!(err instanceof TypeError)) {
+        idempotencyKeyRef.current = null;
+      }
       setBookingState(prev => ({ 
         ...prev, 
         status: `Failed to create booking: ${err.message}`